@@ -0,0 +1,42 @@
+import gc
+import multiprocessing
+import os
+
+# Konfigurasi production: gunicorn -c gunicorn.conf.py (dijalankan dari folder backend)
+pythonpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
+wsgi_app = "wsgi:app"
+
+bind = os.environ.get("KPK_BIND", "0.0.0.0:5000")
+
+# Search berat berjalan di pool proses engine (api/search_service.py), jadi worker HTTP
+# cukup sedikit dengan banyak thread yang sebagian besar hanya menunggu hasil search
+workers = int(os.environ.get("KPK_WORKERS", 2))
+worker_class = "gthread"
+threads = int(os.environ.get("KPK_HTTP_THREADS", 8))
+
+# Core dibagi rata ke pool engine milik setiap worker HTTP
+os.environ.setdefault("KPK_SEARCH_WORKERS", str(max(1, multiprocessing.cpu_count() // workers)))
+
+# Search bisa memakan waktu sampai time_limit engine (7 detik)
+timeout = int(os.environ.get("KPK_WORKER_TIMEOUT", 60))
+graceful_timeout = 30
+keepalive = 5
+
+# Load app (dan tabel engine) di master sebelum fork
+preload_app = True
+
+max_requests = int(os.environ.get("KPK_MAX_REQUESTS", 0))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+errorlog = "-"
+
+def when_ready(server):
+    # Pindahkan object hasil preload ke generasi permanen supaya GC di worker tidak menyentuh page-nya
+    gc.freeze()
+    server.log.info(f"KPK API siap dengan {workers} worker")
+
+def post_worker_init(worker):
+    # Pool engine dibuat per worker setelah fork; worker melaporkan sehat di /api/health setelah warmup selesai
+    from api.warmup import start_warmup
+    start_warmup()
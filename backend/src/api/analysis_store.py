@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import threading
+import time
+
+import chess
+
+from core.symmetry import canonical_fen, mirror_uci
+
+# Store persisten hasil solve (SQLite) supaya hasil search tetap ada setelah restart/deploy.
+# Satu baris per (posisi kanonik, engine); dipakai bersama oleh semua proses gunicorn (mode WAL).
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'analysis.sqlite3')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis (
+    position TEXT NOT NULL,
+    engine TEXT NOT NULL,
+    best_move TEXT NOT NULL,
+    score REAL,
+    depth INTEGER NOT NULL,
+    mate_in INTEGER,
+    nodes INTEGER,
+    updated_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (position, engine)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS analysis_last_used ON analysis (last_used);
+"""
+
+class AnalysisStore:
+    def __init__(self, path, max_entries=200000, compact_every=256):
+        self.path = path
+        self.max_entries = max_entries
+        self.compact_every = compact_every
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        # auto_vacuum hanya berlaku jika di-set sebelum tabel pertama dibuat
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.executescript(SCHEMA)
+
+    # Satu koneksi per thread (sqlite3 tidak boleh dipakai lintas thread)
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, position, engine, min_depth=0):
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT best_move, score, depth, mate_in, nodes FROM analysis WHERE position = ? AND engine = ? AND depth >= ?",
+            (position, engine, min_depth),
+        ).fetchone()
+        if row is None:
+            return None
+
+        conn.execute(
+            "UPDATE analysis SET last_used = ?, hits = hits + 1 WHERE position = ? AND engine = ?",
+            (time.time(), position, engine),
+        )
+        best_move, score, depth, mate_in, nodes = row
+        return {"best_move": best_move, "score": score, "depth": depth, "mate_in": mate_in, "nodes": nodes}
+
+    # Entry lama hanya diganti oleh hasil yang sama dalam atau lebih dalam
+    def save(self, position, engine, best_move, score, depth, mate_in=None, nodes=None):
+        now = time.time()
+        self._connection().execute(
+            """
+            INSERT INTO analysis (position, engine, best_move, score, depth, mate_in, nodes, updated_at, last_used)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (position, engine) DO UPDATE SET
+                best_move = excluded.best_move, score = excluded.score, depth = excluded.depth,
+                mate_in = excluded.mate_in, nodes = excluded.nodes, updated_at = excluded.updated_at,
+                last_used = excluded.last_used
+            WHERE excluded.depth >= analysis.depth
+            """,
+            (position, engine, best_move, score, depth, mate_in, nodes, now, now),
+        )
+
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes % self.compact_every == 0
+        if due:
+            self.compact()
+
+    # Buang entry yang paling lama tidak dipakai jika melewati batas, lalu kembalikan halaman kosong ke disk
+    def compact(self):
+        conn = self._connection()
+        total = conn.execute("SELECT COUNT(*) FROM analysis").fetchone()[0]
+        removed = 0
+
+        if total > self.max_entries:
+            # Sisakan 90% dari batas supaya compaction tidak berjalan di setiap write berikutnya
+            excess = total - int(self.max_entries * 0.9)
+            removed = conn.execute(
+                """
+                DELETE FROM analysis WHERE (position, engine) IN (
+                    SELECT position, engine FROM analysis ORDER BY last_used LIMIT ?
+                )
+                """,
+                (excess,),
+            ).rowcount
+            conn.execute("PRAGMA incremental_vacuum")
+
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+
+    def stats(self):
+        conn = self._connection()
+        entries, hits = conn.execute("SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM analysis").fetchone()
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        return {"entries": entries, "hits": hits, "max_entries": self.max_entries, "bytes": page_count * page_size}
+
+# Key store: EPD posisi (setelah history move) dalam orientasi kanonik
+def analysis_position(fen, moves=None):
+    board = chess.Board(fen)
+    for move in moves or ():
+        board.push_uci(move)
+    return canonical_fen(board.epd())
+
+def orient_uci(uci, mirrored):
+    return mirror_uci(uci) if mirrored else uci
+
+_store = None
+_store_lock = threading.Lock()
+
+# Store dibuka lazily; env KPK_ANALYSIS_DB kosong mematikan store
+def get_analysis_store():
+    global _store
+
+    path = os.environ.get("KPK_ANALYSIS_DB", DEFAULT_PATH)
+    if not path:
+        return None
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = AnalysisStore(path, max_entries=int(os.environ.get("KPK_ANALYSIS_MAX_ENTRIES", 200000)))
+
+    return _store
@@ -1,19 +1,49 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
+from flask_sock import Sock
+from simple_websocket import ConnectionClosed
 import chess
+import json
 import sys
 import os
+import threading
+import time
+from contextlib import ExitStack
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from core.chess_rules import validate_board, apply_move, randomize_board, mate_search
-from core.mabp import minimax_alpha_beta_pruning
-from core.mcts import monte_carlo_tree_search
-from core.iterative_deepening import iterative_deepening_search
+from core.chess_rules import push_move, randomize_board, legal_move_map, lookup_mate_info
+from core.instrumentation import instrumentation_enabled, prometheus_metrics, record_request
+from api.analysis_store import get_analysis_store
+from api.search_service import (
+    ALGORITHMS, SearchBusy, SearchCancelled, SearchTimeout, SearchUnavailable, analyze, client_disconnected, search,
+    search_pool_failure, search_pool_stats, search_pool_warmup_error, stop_search,
+)
+from api.sessions import SessionBusy, sessions, use_session
+from api.warmup import start_warmup, warmup_ready, warmup_status
 from util.board_parser import parse_board, board_to_positions
+from util.bulk_parser import open_upload, parse_positions
+from util.serialization import FastJSONProvider, dumps
 
 app = Flask(__name__)
+# Serializer response JSON (orjson jika tersedia, format compact opsional lewat ?format=compact)
+app.json = FastJSONProvider(app)
 CORS(app, origins=["http://localhost:3000", "http://127.0.0.1:3000"])
+sock = Sock(app)
+
+SESSION_BUSY = {"success": False, "error": "Session is busy with another request"}
+
+# Catat durasi setiap request untuk /api/metrics
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.pop('request_start', None)
+    if start is not None and request.endpoint:
+        record_request(request.endpoint, time.perf_counter() - start, error=response.status_code >= 500)
+    return response
 
 # Untuk handle upload file input
 @app.route('/api/upload', methods=['POST'])
@@ -31,14 +61,11 @@ def upload_board():
         if not file.filename.endswith('.txt'):
             return jsonify({"success": False, "error": "File must be a .txt file"}), 400
         
+        # parse_board juga memvalidasi konfigurasi board (lookup tabel legalitas)
         board = parse_board(file)
         
-        # Validasi konfigurasi board
-        if not validate_board(board):
-            return jsonify({"success": False, "error": "Invalid board configuration"}), 400
-        
         positions = board_to_positions(board)
-        mate_info = mate_search(board)
+        mate_info = lookup_mate_info(board)
         
         return jsonify({
             "success": True,
@@ -52,13 +79,81 @@ def upload_board():
     except Exception as e:
         return jsonify({"success": False, "error": f"Unexpected error: {str(e)}"}), 500
 
+# Untuk upload file berisi banyak posisi (blok 3 baris, satu per baris, FEN/EPD)
+# Hasil analisis dikirim bertahap sebagai NDJSON: satu baris per posisi, lalu satu baris ringkasan
+@app.route('/api/upload/bulk', methods=['POST'])
+def upload_bulk():
+    if 'file' not in request.files:
+        return jsonify({"success": False, "error": "No file uploaded"}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({"success": False, "error": "No file selected"}), 400
+
+    if not file.filename.endswith(('.txt', '.fen', '.epd')):
+        return jsonify({"success": False, "error": "File must be a .txt, .fen or .epd file"}), 400
+
+    # exact=1: sertakan hasil pasti dari solver KPK (bitbase dibangun saat pertama dipakai)
+    exact = request.args.get('exact') in ('1', 'true')
+    limit = request.args.get('limit', type=int)
+
+    # Response di-stream setelah view selesai, saat itu Flask sudah menutup file upload;
+    # generator membaca lewat handle sendiri dan menutupnya setelah selesai
+    try:
+        upload = open_upload(file)
+    except (OSError, ValueError) as e:
+        return jsonify({"success": False, "error": f"Could not read uploaded file: {str(e)}"}), 400
+
+    def generate():
+        summary = {"summary": True, "positions": 0, "valid": 0, "invalid": 0, "failed": 0}
+
+        try:
+            for record in parse_positions(upload):
+                if limit is not None and summary["positions"] >= limit:
+                    break
+                summary["positions"] += 1
+
+                if "error" in record:
+                    summary["invalid"] += 1
+                    yield dumps(record) + b"\n"
+                    continue
+
+                summary["valid"] += 1
+                analysis = analyze_position(record["line"], record["board"], exact)
+                if "error" in analysis:
+                    summary["failed"] += 1
+                yield dumps(analysis) + b"\n"
+        except OSError as e:
+            # File rusak/terpotong di tengah: posisi yang sudah dianalisis tetap terkirim, ringkasan memuat error
+            summary["error"] = f"Could not read uploaded file: {str(e)}"
+        finally:
+            upload.close()
+
+        yield dumps(summary) + b"\n"
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+# Analisis dijalankan di pool proses engine dengan deadline per posisi; posisi yang gagal (antrian penuh,
+# deadline, pool rusak) menjadi record error tanpa menghentikan upload
+def analyze_position(line, board, exact=False):
+    try:
+        analysis = analyze(board.fen(), exact)
+    except SearchBusy:
+        return {"line": line, "error": f"Baris {line}: Search queue is full, try again later"}
+    except SearchTimeout:
+        return {"line": line, "error": f"Baris {line}: Analysis deadline exceeded"}
+    except (SearchCancelled, SearchUnavailable, RuntimeError) as e:
+        return {"line": line, "error": f"Baris {line}: Analysis failed: {str(e) or type(e).__name__}"}
+
+    return {"line": line, **analysis}
+
 # Untuk handle randomization board
 @app.route('/api/randomize', methods=['POST'])
 def randomize():
     try:
         board = randomize_board()
         positions = board_to_positions(board)
-        mate_info = mate_search(board)
+        mate_info = lookup_mate_info(board)
         
         return jsonify({
             "success": True,
@@ -86,108 +181,159 @@ def solve():
         if not fen or not algorithm:
             return jsonify({"success": False, "error": "Missing fen or algorithm"}), 400
         
-        board = chess.Board(fen)
-
-        # Validasi turn
-        if not board.turn == chess.WHITE:
-            return jsonify({"success": False, "error": "It's not AI Magnus's turn"}), 400
-        
         print(f"Solving with algorithm: {algorithm}")
         
-        if promotion_move:
-            try:
-                move = chess.Move.from_uci(promotion_move)
-                if move in board.legal_moves:
-                    board.push(move)
-                    positions = board_to_positions(board)
-                    mate_info = mate_search(board)
-                    
-                    return jsonify({
-                        "success": True,
-                        "move": promotion_move,
-                        "board": board.fen(),
-                        "positions": positions,
-                        "mate_info": mate_info,
-                        "analysis": {
-                            "evaluation": 0,
-                            "time": 0.001,
-                            "promotion": True
-                        }
-                    })
-                else:
-                    return jsonify({"success": False, "error": "Invalid promotion move"}), 400
-            except Exception as e:
-                return jsonify({"success": False, "error": f"Promotion move error: {str(e)}"}), 400
-        
-        # Solve based on algoritma yang dipilih
-        if algorithm == 'mabp':
-            result = minimax_alpha_beta_pruning(fen, depth=5)
-        elif algorithm == 'mcts':
-            result = monte_carlo_tree_search(fen, time_limit=7.0)
-        elif algorithm == 'iterative_deepening':
-            result = iterative_deepening_search(fen, max_depth=5, time_limit=7.0)
-        else:
-            return jsonify({"success": False, "error": "Invalid algorithm"}), 400
+        # Profiling opt-in lewat flag request (atau env KPK_INSTRUMENTATION)
+        options = {
+            'profile': bool(data.get('profile')) or instrumentation_enabled(),
+            'cprofile': bool(data.get('cprofile')),
+            'cache': data.get('cache', True) is not False,
+            'rollout': data.get('rollout'),
+        }
+        deadline = float(data['deadline']) if data.get('deadline') else None
+        environ = request.environ
 
-        if 'error' in result:
-            return jsonify({"success": False, "error": result['error']}), 400
-        
-        # Kondisi jika game_over (bisa checkmate, draw)
-        if result.get('game_over'):
-            return jsonify({
-                "success": True,
-                "game_over": True,
-                "game_over_reason": result.get('game_over_reason'),
-                "analysis": result,
-                "message": f"Game is over: {result.get('game_over_reason', 'unknown')}"
-            })
-        
-        if result.get('mate') and not result.get('best_move'):
-            return jsonify({
-                "success": True,
-                "mate": True,
-                "mate_info": result.get('mate_info'),
-                "analysis": result,
-                "message": "Position has forced mate sequence"
-            })
-        
-        best_move = result.get('best_move')
-        if not best_move:
-            return jsonify({"success": False, "error": "No valid move found"}), 400
-        
-        move = chess.Move.from_uci(best_move)
+        # Board dari sesi (jika ada session_id) supaya history dan state engine tetap terjaga
+        session = sessions.resolve(data.get('session_id'), fen)
+        with use_session(session, fen):
+            board = session.board if session else chess.Board(fen)
+
+            # Validasi turn
+            if not board.turn == chess.WHITE:
+                return jsonify({"success": False, "error": "It's not AI Magnus's turn"}), 400
+
+            payload, status = ai_move(board, session, fen, algorithm, promotion_move, options, deadline,
+                                      is_disconnected=lambda: client_disconnected(environ))
+        if status == 429:
+            return jsonify(payload), status, {"Retry-After": "1"}
+        return jsonify(payload), status
+    
+    except SessionBusy:
+        return jsonify(SESSION_BUSY), 409
+    except Exception as e:
+        print(f"Error in solve endpoint: {str(e)}")
+        return jsonify({"success": False, "error": f"Unexpected error: {str(e)}"}), 500
 
-        # Untuk promosiin pawn
-        if board.piece_at(move.from_square) and board.piece_at(move.from_square).piece_type == chess.PAWN:
-            to_rank = chess.square_rank(move.to_square)
-            if (board.turn == chess.WHITE and to_rank == 7):
-                return jsonify({
+# Hentikan search yang sedang berjalan untuk sesi; request /api/solve yang menunggu menerima move terbaik sejauh ini
+@app.route('/api/solve/stop', methods=['POST'])
+def stop_solve():
+    data = request.get_json(silent=True) or {}
+    session_id = data.get('session_id')
+    if not session_id:
+        return jsonify({"success": False, "error": "session_id is required"}), 400
+    # Registry search per proses worker: dengan beberapa worker gunicorn, stop yang mendarat di worker lain
+    # tidak menemukan search-nya dan dibalas 404 (bukan sukses palsu)
+    if not stop_search(session_id):
+        return jsonify({"success": False, "stopped": False,
+                        "error": "No running search for this session in this worker"}), 404
+    return jsonify({"success": True, "stopped": True})
+
+# Jalankan giliran AI Magnus (promosi atau search) pada board, dipakai oleh /api/solve dan WebSocket
+def ai_move(board, session, fen, algorithm, promotion_move=None, options=None, deadline=None,
+            is_disconnected=None, on_info=None):
+    if promotion_move:
+        try:
+            if push_move(board, promotion_move):
+                positions = board_to_positions(board)
+                mate_info = session.mate_info_for(board) if session else lookup_mate_info(board)
+                
+                return {
                     "success": True,
-                    "promotion_required": True,
-                    "move": best_move,
-                    "analysis": result,
-                    "message": "AI Magnus needs to choose promotion piece"
-                })
-        
-        new_board, success = apply_move(fen, best_move)
-        if not success:
-            return jsonify({"success": False, "error": "Failed to apply move"}), 400
+                    "session_id": session.id if session else None,
+                    "move": promotion_move,
+                    "board": board.fen(),
+                    "positions": positions,
+                    "mate_info": mate_info,
+                    "analysis": {
+                        "evaluation": 0,
+                        "time": 0.001,
+                        "promotion": True
+                    }
+                }, 200
+            else:
+                return {"success": False, "error": "Invalid promotion move"}, 400
+        except Exception as e:
+            return {"success": False, "error": f"Promotion move error: {str(e)}"}, 400
+    
+    if algorithm not in ALGORITHMS:
+        return {"success": False, "error": "Invalid algorithm"}, 400
 
-        positions = board_to_positions(new_board)
-        mate_info = mate_search(new_board)
+    search_fen, moves = session.search_position() if session else (fen, None)
 
-        return jsonify({
+    # Search dijalankan di pool proses engine, bukan di thread HTTP
+    try:
+        result = search(algorithm, search_fen, options or {}, deadline=deadline, is_disconnected=is_disconnected,
+                        moves=moves, session_id=session.id if session else None, on_info=on_info)
+    except SearchBusy:
+        return {"success": False, "error": "Search queue is full, try again later"}, 429
+    except SearchTimeout:
+        return {"success": False, "error": "Search deadline exceeded"}, 504
+    except SearchCancelled:
+        return {"success": False, "error": "Search cancelled"}, 499
+    except SearchUnavailable as e:
+        return {"success": False, "error": f"Search unavailable: {str(e)}"}, 503
+
+    payload, status = solve_position(board, result, session)
+    if session:
+        payload['session_id'] = session.id
+    return payload, status
+
+# Susun response dari hasil search algoritma yang dipilih
+def solve_position(board, result, session=None):
+    if 'error' in result:
+        return {"success": False, "error": result['error']}, 400
+    
+    # Kondisi jika game_over (bisa checkmate, draw)
+    if result.get('game_over'):
+        return {
             "success": True,
-            "move": best_move,
-            "board": new_board.fen(),
-            "positions": positions,
+            "game_over": True,
+            "game_over_reason": result.get('game_over_reason'),
             "analysis": result,
-            "mate_info": mate_info
-        })
+            "message": f"Game is over: {result.get('game_over_reason', 'unknown')}"
+        }, 200
     
-    except Exception as e:
-        print(f"Error in solve endpoint: {str(e)}")
-        return jsonify({"success": False, "error": f"Unexpected error: {str(e)}"}), 500
+    if result.get('mate') and not result.get('best_move'):
+        return {
+            "success": True,
+            "mate": True,
+            "mate_info": result.get('mate_info'),
+            "analysis": result,
+            "message": "Position has forced mate sequence"
+        }, 200
+    
+    best_move = result.get('best_move')
+    if not best_move:
+        return {"success": False, "error": "No valid move found"}, 400
+    
+    move = chess.Move.from_uci(best_move)
+
+    # Untuk promosiin pawn
+    if board.piece_at(move.from_square) and board.piece_at(move.from_square).piece_type == chess.PAWN:
+        to_rank = chess.square_rank(move.to_square)
+        if (board.turn == chess.WHITE and to_rank == 7):
+            return {
+                "success": True,
+                "promotion_required": True,
+                "move": best_move,
+                "analysis": result,
+                "message": "AI Magnus needs to choose promotion piece"
+            }, 200
+    
+    if not push_move(board, best_move):
+        return {"success": False, "error": "Failed to apply move"}, 400
+
+    positions = board_to_positions(board)
+    mate_info = session.mate_info_for(board) if session else lookup_mate_info(board)
+
+    return {
+        "success": True,
+        "move": best_move,
+        "board": board.fen(),
+        "positions": positions,
+        "analysis": result,
+        "mate_info": mate_info
+    }, 200
 
 # Untuk handle move dari Gukesh
 @app.route('/api/gukesh-move', methods=['POST'])
@@ -204,29 +350,224 @@ def make_move():
         if not fen or not move:
             return jsonify({"success": False, "error": "Missing fen or move"}), 400
         
-        board = chess.Board(fen)
+        session = sessions.resolve(data.get('session_id'), fen)
+        with use_session(session, fen):
+            board = session.board if session else chess.Board(fen)
 
-        # Validasi turn
-        if not board.turn == chess.BLACK:
-            return jsonify({"success": False, "error": "It's not Gukesh's turn"}), 400
-        
-        new_board, success = apply_move(fen, move)
-        if not success:
-            return jsonify({"success": False, "error": "Failed to apply move"}), 400
-        
-        positions = board_to_positions(new_board)
-        mate_info = mate_search(new_board)
+            # Validasi turn
+            if not board.turn == chess.BLACK:
+                return jsonify({"success": False, "error": "It's not Gukesh's turn"}), 400
+
+            if not push_move(board, move):
+                return jsonify({"success": False, "error": "Failed to apply move"}), 400
+
+            positions = board_to_positions(board)
+            mate_info = session.mate_info_for(board) if session else lookup_mate_info(board)
+
+            return jsonify({
+                "success": True,
+                "session_id": session.id if session else None,
+                "board": board.fen(),
+                "positions": positions,
+                "mate_info": mate_info
+            })
+    
+    except SessionBusy:
+        return jsonify(SESSION_BUSY), 409
+    except Exception as e:
+        return jsonify({"success": False, "error": f"Unexpected error: {str(e)}"}), 500
+
+# Untuk membuat sesi game di server (board, history, dan state engine disimpan antar request)
+@app.route('/api/session', methods=['POST'])
+def create_session():
+    try:
+        data = request.get_json(silent=True) or {}
+        fen = data.get('fen')
+
+        if not fen:
+            return jsonify({"success": False, "error": "Missing fen"}), 400
+
+        session = sessions.create(fen)
+        board = session.board
 
         return jsonify({
             "success": True,
-            "board": new_board.fen(),
-            "positions": positions,
-            "mate_info": mate_info
+            "session_id": session.id,
+            "board": board.fen(),
+            "positions": board_to_positions(board),
+            "mate_info": session.mate_info_for(board)
         })
-    
+
+    except ValueError as e:
+        return jsonify({"success": False, "error": f"Invalid FEN: {str(e)}"}), 400
     except Exception as e:
         return jsonify({"success": False, "error": f"Unexpected error: {str(e)}"}), 500
 
+# Untuk menghapus sesi game
+@app.route('/api/session/<session_id>', methods=['DELETE'])
+def delete_session(session_id):
+    if not sessions.delete(session_id):
+        return jsonify({"success": False, "error": "Session not found"}), 404
+    return jsonify({"success": True})
+
+# Channel WebSocket untuk satu game: move Gukesh, balasan AI Magnus, dan info search lewat satu koneksi
+# Pesan client: {"type": "start", "fen", "session_id"?}, {"type": "move", "move", "algorithm"?},
+# {"type": "solve", "algorithm", "promotion_move"?}, {"type": "stop"}, {"type": "ping"}; field "id" dikembalikan
+# di balasan. Search berjalan di thread terpisah supaya pesan stop tetap dibaca selama search.
+@sock.route('/api/ws')
+def game_socket(ws):
+    send_lock = threading.Lock()
+    session = None
+
+    def send(message):
+        with send_lock:
+            ws.send(dumps(message).decode())
+
+    while True:
+        try:
+            raw = ws.receive()
+        except ConnectionClosed:
+            break
+        if raw is None:
+            continue
+
+        try:
+            message = json.loads(raw)
+            session, task = handle_socket_message(ws, message, session, send)
+            if task is not None:
+                threading.Thread(target=task, name="ws-search", daemon=True).start()
+        except ConnectionClosed:
+            break
+        except SessionBusy:
+            send(dict(SESSION_BUSY, type="error", status=409, id=message.get('id')))
+        except ValueError as e:
+            send({"type": "error", "status": 400, "error": f"Invalid message: {str(e)}"})
+        except Exception as e:
+            send({"type": "error", "status": 500, "error": f"Unexpected error: {str(e)}"})
+
+# Return (sesi, callable search atau None); callable dijalankan di thread lain dan memegang lock sesi sampai selesai
+def handle_socket_message(ws, message, session, send):
+    kind = message.get('type')
+    message_id = message.get('id')
+
+    def reply(payload, reply_type, status=200):
+        payload = dict(payload, type=reply_type if payload.get('success', True) else "error", id=message_id)
+        if not payload.get('success', True):
+            payload['status'] = status
+        send(payload)
+
+    if kind == 'ping':
+        reply({}, "pong")
+        return session, None
+
+    # Stop search sesi yang sedang berjalan (sama seperti /api/solve/stop); ai_move tetap dikirim dengan move terbaik
+    if kind == 'stop':
+        reply({"stopped": stop_search(session.id) if session else False}, "stopped")
+        return session, None
+
+    if kind == 'start':
+        fen = message.get('fen')
+        if not fen:
+            reply({"success": False, "error": "Missing fen"}, "error", 400)
+            return session, None
+        session = sessions.resolve(message.get('session_id'), fen) or sessions.create(fen)
+        with session.use(fen):
+            reply(position_payload(session), "position")
+        return session, None
+
+    if kind not in ('move', 'solve'):
+        reply({"success": False, "error": f"Unknown message type: {kind}"}, "error", 400)
+        return session, None
+
+    if session is None:
+        reply({"success": False, "error": "Game not started"}, "error", 400)
+        return session, None
+
+    # Sesi bisa sudah dibuang (LRU) atau dipakai lewat HTTP di worker lain; daftarkan ulang dari board terakhir
+    if sessions.get(session.id) is None:
+        session = sessions.resolve(session.id, session.board.fen())
+
+    # Lock diambil di thread receive (urutan pesan terjaga) dan dilepas oleh thread search
+    lock = ExitStack()
+    lock.enter_context(session.use())
+    try:
+        play = handle_session_message(ws, message, session, kind, reply, send)
+    except BaseException:
+        lock.close()
+        raise
+    if play is None:
+        lock.close()
+        return session, None
+
+    def task():
+        with lock:
+            try:
+                play()
+            except ConnectionClosed:
+                pass
+            except Exception as e:
+                try:
+                    send({"type": "error", "status": 500, "id": message.get('id'), "error": f"Unexpected error: {str(e)}"})
+                except ConnectionClosed:
+                    pass
+
+    return session, task
+
+# Pesan move/solve dengan lock sesi dipegang; return callable yang menjalankan search AI (atau None)
+def handle_session_message(ws, message, session, kind, reply, send):
+    message_id = message.get('id')
+    board = session.board
+
+    if kind == 'move':
+        if board.turn != chess.BLACK:
+            reply({"success": False, "error": "It's not Gukesh's turn"}, "error", 400)
+            return
+        if not push_move(board, message.get('move') or ''):
+            reply({"success": False, "error": "Failed to apply move"}, "error", 400)
+            return
+        reply(position_payload(session), "position")
+
+        # Balasan AI langsung dijalankan jika client menyertakan algoritma
+        algorithm = message.get('algorithm')
+        if not algorithm or board.is_game_over():
+            return
+    else:
+        algorithm = message.get('algorithm')
+        if board.turn != chess.WHITE:
+            reply({"success": False, "error": "It's not AI Magnus's turn"}, "error", 400)
+            return
+
+    options = {
+        'profile': bool(message.get('profile')) or instrumentation_enabled(),
+        'cprofile': bool(message.get('cprofile')),
+        'cache': message.get('cache', True) is not False,
+        'rollout': message.get('rollout'),
+    }
+    deadline = float(message['deadline']) if message.get('deadline') else None
+
+    def on_info(info):
+        try:
+            send({"type": "info", "id": message_id, "algorithm": algorithm, **info})
+        except ConnectionClosed:
+            pass
+
+    def play():
+        payload, status = ai_move(board, session, board.fen(), algorithm, message.get('promotion_move'), options,
+                                  deadline, is_disconnected=lambda: not ws.connected, on_info=on_info)
+        reply(payload, "ai_move", status)
+
+    return play
+
+def position_payload(session):
+    board = session.board
+    return {
+        "success": True,
+        "session_id": session.id,
+        "board": board.fen(),
+        "positions": board_to_positions(board),
+        "mate_info": session.mate_info_for(board)
+    }
+
 # Untuk handle legal moves
 @app.route('/api/legal-moves', methods=['POST'])
 def get_legal_moves():
@@ -242,27 +583,15 @@ def get_legal_moves():
         if not fen:
             return jsonify({"success": False, "error": "Missing fen"}), 400
         
-        board = chess.Board(fen)
+        # Satu parse dan scan legal move per FEN, hasilnya di-cache untuk request berikutnya
+        move_map = legal_move_map(fen, with_mate_info=bool(data.get('with_mate_info')))
         
         if square:
-            square_index = chess.parse_square(square)
-            piece = board.piece_at(square_index)
-            
-            if piece is None:
-                return jsonify({"success": True, "legal_moves": []})
-            
-            if piece.color != board.turn:
-                return jsonify({"success": True, "legal_moves": []})
-            
-            legal_moves = []
-            for move in board.legal_moves:
-                if move.from_square == square_index:
-                    legal_moves.append(chess.square_name(move.to_square))
-            
-            return jsonify({"success": True, "legal_moves": legal_moves})
+            chess.parse_square(square)
+            return jsonify({"success": True, "legal_moves": move_map["moves"].get(square, [])})
         else:
-            legal_moves = [move.uci() for move in board.legal_moves]
-            return jsonify({"success": True, "legal_moves": legal_moves})
+            # Peta lengkap from-square -> destinations untuk seluruh board dalam satu response
+            return jsonify(dict(move_map, success=True))
     
     except Exception as e:
         return jsonify({"success": False, "error": f"Unexpected error: {str(e)}"}), 500
@@ -283,7 +612,7 @@ def parse_fen():
         
         board = chess.Board(fen)
         positions = board_to_positions(board)
-        mate_info = mate_search(board)
+        mate_info = lookup_mate_info(board)
         
         return jsonify({
             "success": True,
@@ -294,10 +623,42 @@ def parse_fen():
     except Exception as e:
         return jsonify({"success": False, "error": f"Failed to parse FEN: {str(e)}"}), 500
 
-# Untuk cek status koneksi
+# Untuk cek status koneksi; 503 selama warmup supaya load balancer belum mengirim traffic ke worker ini
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "ok", "message": "Chess API is running"})
+    failure = search_pool_failure()
+    if failure is not None:
+        return jsonify({"status": "unavailable", "message": "Search workers failed to start", "error": failure}), 503
+
+    warmup = warmup_status()
+    if not warmup_ready():
+        return jsonify({"status": "warming_up", "message": "Chess API is warming up", "warmup": warmup}), 503
+
+    # Warmup gagal (termasuk proses engine pengganti): request tetap dilayani tapi cold, dilaporkan 'degraded'
+    engine_warmup_error = search_pool_warmup_error()
+    if warmup.get("state") == "failed" or engine_warmup_error is not None:
+        return jsonify({"status": "degraded", "message": "Chess API is running without warmup", "warmup": warmup,
+                        "engine_warmup_error": engine_warmup_error})
+    return jsonify({"status": "ok", "message": "Chess API is running", "warmup": warmup})
+
+# Untuk export metrics format Prometheus
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    lines = [prometheus_metrics()]
+    lines.append("# HELP kpk_search_pool Status pool proses engine.")
+    lines.append("# TYPE kpk_search_pool gauge")
+    for key, value in sorted(search_pool_stats().items()):
+        lines.append(f'kpk_search_pool{{state="{key}"}} {value}')
+    store = get_analysis_store()
+    if store is not None:
+        lines.append("# HELP kpk_analysis_store Isi store analisis persisten.")
+        lines.append("# TYPE kpk_analysis_store gauge")
+        for key, value in sorted(store.stats().items()):
+            lines.append(f'kpk_analysis_store{{stat="{key}"}} {value}')
+    return Response("\n".join(lines) + "\n", mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
+    # Reloader menjalankan app di proses anak; warmup hanya di proses yang melayani request
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_warmup()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
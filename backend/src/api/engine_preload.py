@@ -0,0 +1,13 @@
+import gc
+
+from api.search_service import ENGINE_FUNCTIONS, load_engine
+from api.warmup import warm_tables
+
+# Di-preload oleh forkserver pool engine: modul engine dan tabel dibangun sekali di proses forkserver,
+# lalu setiap proses engine (termasuk pengganti) mewarisinya lewat fork secara copy-on-write
+warm_tables()
+for algorithm in ENGINE_FUNCTIONS:
+    load_engine(algorithm)
+
+# Object hasil preload tidak disentuh GC di proses engine supaya page-nya tetap dibagi
+gc.freeze()
@@ -0,0 +1,719 @@
+import atexit
+import importlib
+import itertools
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import CancelledError, Future, TimeoutError as FutureTimeoutError
+
+import sqlite3
+
+import chess
+
+from api.analysis_store import analysis_position, get_analysis_store, orient_uci
+from api.warmup import warmup_enabled
+from core.instrumentation import count, profiling, record_profile
+from core.search_control import SearchControl
+from core.search_state import SearchState
+
+logger = logging.getLogger(__name__)
+
+# Search service: pool proses engine dengan antrian terbatas, deadline, dan cancellation
+ALGORITHMS = ('mabp', 'mcts', 'iterative_deepening')
+
+# Modul engine di-import saat pertama dipakai: proses HTTP yang search-nya berjalan di pool
+# tidak pernah memuat engine (dan tabel evaluation) untuk endpoint ringan
+ENGINE_FUNCTIONS = {
+    'mabp': ('core.mabp', 'minimax_alpha_beta_pruning'),
+    'mcts': ('core.mcts', 'monte_carlo_tree_search'),
+    'iterative_deepening': ('core.iterative_deepening', 'iterative_deepening_search'),
+}
+
+DEFAULT_TIME_LIMIT = 7.0
+DEFAULT_DEPTH = 5
+
+# Task analisis posisi (upload bulk): mate_info + hasil pasti bitbase, dijalankan di pool seperti search
+ANALYSIS = 'analysis'
+
+# Hasil dari store hanya dipakai jika minimal sedalam search yang akan dijalankan. MCTS: jumlah iterasi,
+# kira-kira setengah dari yang dicapai rollout random dalam DEFAULT_TIME_LIMIT
+STORE_MIN_DEPTH = {'mabp': DEFAULT_DEPTH, 'iterative_deepening': DEFAULT_DEPTH, 'mcts': 500}
+
+class SearchBusy(Exception):
+    pass
+
+class SearchTimeout(Exception):
+    pass
+
+class SearchCancelled(Exception):
+    pass
+
+# Pool tidak bisa menjalankan search (proses engine terus crash saat startup)
+class SearchUnavailable(Exception):
+    pass
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+def search_workers():
+    return _env_int("KPK_SEARCH_WORKERS", os.cpu_count() or 1)
+
+def search_queue_size():
+    return _env_int("KPK_SEARCH_QUEUE", 16)
+
+def default_deadline():
+    return float(os.environ.get("KPK_SEARCH_DEADLINE", 20.0))
+
+# Deadline per posisi untuk analisis upload bulk
+def analysis_deadline():
+    return float(os.environ.get("KPK_BULK_DEADLINE", 5.0))
+
+# Waktu tunggu hasil setelah engine diminta berhenti, sebelum proses engine dimatikan paksa
+def stop_grace():
+    return float(os.environ.get("KPK_SEARCH_STOP_GRACE", 1.0))
+
+# Batas crash berturut-turut sebelum 'ready' (import/init gagal) sebelum pool berhenti me-respawn proses
+def max_startup_failures():
+    return _env_int("KPK_SEARCH_MAX_RESTARTS", 5)
+
+def restart_backoff(failures):
+    return min(30.0, 0.5 * 2 ** (failures - 1))
+
+def load_engine(algorithm):
+    module_name, function_name = ENGINE_FUNCTIONS[algorithm]
+    return getattr(importlib.import_module(module_name), function_name)
+
+# State engine (TT, tree MCTS) per sesi, disimpan di proses yang menjalankan search
+_engine_states = OrderedDict()
+_engine_states_lock = threading.Lock()
+
+def _engine_state_budget():
+    return _env_int("KPK_ENGINE_STATE_MB", 64) * 1024 * 1024
+
+def engine_state(session_id):
+    with _engine_states_lock:
+        state = _engine_states.get(session_id)
+        if state is not None:
+            _engine_states.move_to_end(session_id)
+            count("session_state_hits")
+            return state
+
+        state = SearchState(tt_entries=_env_int("KPK_TT_ENTRIES", 100000))
+        _engine_states[session_id] = state
+        return state
+
+def _evict_engine_states():
+    with _engine_states_lock:
+        budget = _engine_state_budget()
+        total = sum(state.approximate_bytes() for state in _engine_states.values())
+        while len(_engine_states) > 1 and total > budget:
+            _, state = _engine_states.popitem(last=False)
+            total -= state.approximate_bytes()
+
+# Dijalankan di proses engine (atau inline jika pool dimatikan). cancel_event di-set oleh pool/API untuk
+# menghentikan search; engine lalu mengembalikan hasil terbaik sejauh ini.
+def run_search(algorithm, fen, options, moves=None, session_id=None, on_info=None, cancel_event=None, is_cancelled=None):
+    if algorithm == ANALYSIS:
+        return run_analysis(fen, options, cancel_event)
+
+    time_limit = min(DEFAULT_TIME_LIMIT, options.get('time_limit', DEFAULT_TIME_LIMIT))
+    use_cprofile = bool(options.get('cprofile'))
+    profile_enabled = bool(options.get('profile')) or use_cprofile
+
+    # Board sesi dibangun ulang dari FEN awal + history move
+    position = fen
+    if moves:
+        position = chess.Board(fen)
+        for move in moves:
+            position.push_uci(move)
+
+    with profiling(profile_enabled, use_cprofile=use_cprofile, record=False) as profile:
+        state = engine_state(session_id) if session_id else None
+        control = SearchControl(time_limit=time_limit, cancel_event=cancel_event, is_cancelled=is_cancelled)
+
+        if algorithm not in ENGINE_FUNCTIONS:
+            return {'error': f"Invalid algorithm: {algorithm}", 'mate': False, 'best_move': None}
+
+        engine = load_engine(algorithm)
+        if algorithm == 'mabp':
+            result = engine(position, depth=DEFAULT_DEPTH, state=state, control=control)
+        elif algorithm == 'mcts':
+            rollout = {'rollout': options['rollout']} if options.get('rollout') else {}
+            result = engine(position, state=state, on_info=on_info, control=control, **rollout)
+        else:
+            result = engine(position, max_depth=DEFAULT_DEPTH, state=state, on_info=on_info, control=control)
+
+    if session_id:
+        _evict_engine_states()
+
+    if profile is not None:
+        result['profile'] = profile.to_dict()
+    return result
+
+# Analisis satu posisi; mate_search yang terpotong time_limit/cancel ditandai 'stopped' (mate_info belum pasti)
+def run_analysis(fen, options, cancel_event=None):
+    from core.chess_rules import lookup_mate_info
+    from core.kpk_bitbase import RESULT_NAMES, probe
+
+    board = chess.Board(fen)
+    control = SearchControl(time_limit=options.get('time_limit'), cancel_event=cancel_event)
+    analysis = {"board": fen, "mate_info": lookup_mate_info(board, control=control)}
+    if control.stopped:
+        analysis["stopped"] = control.reason
+
+    if options.get('exact'):
+        outcome = probe(board)
+        if outcome is not None:
+            analysis["result"] = RESULT_NAMES[outcome[0]]
+            analysis["plies"] = outcome[1]
+
+    return analysis
+
+def _engine_main(conn, cancel_event, warmup=False):
+    # Warmup sebelum menerima task pertama; pool menandai proses siap setelah pesan 'ready'. Warmup gagal
+    # tidak menahan proses (task tetap dijalankan, cold), errornya dikirim bersama 'ready' dan dicatat pool
+    warmup_error = None
+    if warmup:
+        from api.warmup import warm_engines
+        try:
+            warm_engines()
+        except Exception as e:
+            logger.exception("Search engine warmup failed in process %s", os.getpid())
+            warmup_error = f"{type(e).__name__}: {e}"
+    try:
+        conn.send((None, 'ready', warmup_error))
+    except (BrokenPipeError, OSError):
+        return
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+
+        task_id, algorithm, fen, moves, session_id, options = message
+
+        # Info search sementara dikirim balik lewat pipe yang sama jika client meminta streaming
+        on_info = None
+        if options.get('stream'):
+            on_info = lambda info, task_id=task_id: conn.send((task_id, 'info', info))
+
+        try:
+            result = run_search(algorithm, fen, options, moves, session_id, on_info, cancel_event)
+        except Exception as e:
+            result = {'error': str(e), 'mate': False, 'best_move': None}
+
+        try:
+            conn.send((task_id, 'result', result))
+        except (BrokenPipeError, OSError):
+            break
+
+class _EngineProcess:
+    def __init__(self, ctx, warmup=False):
+        self.conn, child_conn = ctx.Pipe()
+        # Flag cancel kooperatif: engine berhenti di pengecekan berikutnya dan tetap mengirim hasil
+        self.cancel_event = ctx.Event()
+        self.process = ctx.Process(target=_engine_main, args=(child_conn, self.cancel_event, warmup), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.started_at = time.monotonic()
+        self.sessions = set()
+        self.task_id = None
+        self.retired = False
+        self.ready = False
+        self.warmup_error = None
+
+class SearchTask:
+    def __init__(self, task_id, algorithm, fen, moves, session_id, options, deadline, on_info=None):
+        self.id = task_id
+        self.algorithm = algorithm
+        self.fen = fen
+        self.moves = moves
+        self.session_id = session_id
+        self.options = options
+        self.deadline = deadline
+        self.on_info = on_info
+        self.future = Future()
+
+# Proses engine di-fork dari forkserver (bukan dari master gunicorn), jadi tabel dibangun sekali di forkserver
+# lewat api.engine_preload. Forkserver tidak memakai sys.path parent saat preload, jadi folder src diteruskan
+# lewat PYTHONPATH (preload yang gagal di-import diabaikan diam-diam oleh multiprocessing).
+ENGINE_PRELOAD = ['api.engine_preload']
+
+def _preload_forkserver(ctx):
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    paths = [path for path in os.environ.get("PYTHONPATH", "").split(os.pathsep) if path]
+    if src_dir not in paths:
+        os.environ["PYTHONPATH"] = os.pathsep.join([src_dir] + paths)
+    ctx.set_forkserver_preload(ENGINE_PRELOAD)
+
+class SearchPool:
+    def __init__(self, workers, max_pending, warmup=False):
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self._ctx = multiprocessing.get_context(start_method)
+        if start_method == 'forkserver':
+            _preload_forkserver(self._ctx)
+        self._cond = threading.Condition()
+        self._pending = deque()
+        self._max_pending = max_pending
+        self._engines = []
+        self._idle = []
+        self._running = {}
+        self._ids = itertools.count(1)
+        self._closed = False
+        self._warmup = warmup
+        self._startup_failures = 0
+
+        # Alasan pool rusak (None jika sehat); request langsung ditolak dengan SearchUnavailable
+        self.failure = None
+
+        self.workers = workers
+        for _ in range(workers):
+            self._start_process()
+
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="search-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    # Proses baru (termasuk pengganti proses yang di-retire) baru menerima task setelah selesai warmup
+    def _start_process(self):
+        engine = _EngineProcess(self._ctx, self._warmup)
+        self._engines.append(engine)
+        threading.Thread(target=self._read_loop, args=(engine,), name="search-reader", daemon=True).start()
+
+    def _retire(self, engine):
+        engine.retired = True
+        self._engines.remove(engine)
+        if engine in self._idle:
+            self._idle.remove(engine)
+        engine.process.terminate()
+        if not self._closed and self.failure is None:
+            self._start_process()
+
+    def _read_loop(self, engine):
+        while True:
+            try:
+                task_id, kind, result = engine.conn.recv()
+            except (EOFError, OSError):
+                break
+
+            if kind == 'ready':
+                if result is not None:
+                    logger.warning("Search engine process %s warmup failed: %s", engine.process.pid, result)
+                with self._cond:
+                    engine.ready = True
+                    engine.warmup_error = result
+                    self._startup_failures = 0
+                    if not engine.retired:
+                        self._idle.append(engine)
+                    self._cond.notify_all()
+                continue
+
+            if kind == 'info':
+                with self._cond:
+                    task = self._running.get(task_id)
+                if task is not None and task.on_info is not None:
+                    try:
+                        task.on_info(result)
+                    except Exception:
+                        pass
+                continue
+
+            with self._cond:
+                task = self._running.pop(task_id, None)
+                engine.task_id = None
+                if not engine.retired:
+                    self._idle.append(engine)
+                    self._cond.notify_all()
+
+            if task is not None and not task.future.done():
+                task.future.set_result(result)
+
+        # Proses mati di luar cancel (crash): ganti dengan proses baru. Crash sebelum 'ready' dihitung
+        # berturut-turut; respawn diberi backoff dan berhenti setelah max_startup_failures()
+        engine.process.join(timeout=1)
+        with self._cond:
+            if engine.retired or self._closed:
+                return
+            startup_crash = not engine.ready
+            if startup_crash:
+                self._startup_failures += 1
+            failures = self._startup_failures
+
+        if startup_crash:
+            logger.warning("Search engine process %s exited during startup (exit code %s, failure %d/%d)",
+                           engine.process.pid, engine.process.exitcode, failures, max_startup_failures())
+            if failures >= max_startup_failures():
+                self._fail(engine, f"Search engine process failed to start {failures} times "
+                                   f"(last exit code {engine.process.exitcode})")
+                return
+            time.sleep(restart_backoff(failures))
+        else:
+            logger.warning("Search engine process %s crashed (exit code %s), restarting",
+                           engine.process.pid, engine.process.exitcode)
+
+        with self._cond:
+            if engine.retired:
+                return
+            task = self._running.pop(engine.task_id, None)
+            self._retire(engine)
+            self._cond.notify_all()
+
+        if task is not None and not task.future.done():
+            task.future.set_exception(RuntimeError("Search worker crashed"))
+
+    # Tandai pool rusak: tidak ada respawn lagi, task di antrian dan request baru langsung gagal
+    def _fail(self, engine, reason):
+        logger.error("%s; search pool disabled", reason)
+        with self._cond:
+            self.failure = reason
+            if not engine.retired:
+                self._retire(engine)
+            pending = list(self._pending)
+            self._pending.clear()
+            self._cond.notify_all()
+
+        for task in pending:
+            if not task.future.done():
+                task.future.set_exception(SearchUnavailable(reason))
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                while not self._closed and not (self._pending and self._idle):
+                    self._cond.wait()
+                if self._closed:
+                    return
+
+                task = self._pending.popleft()
+                if not task.future.set_running_or_notify_cancel():
+                    continue
+
+                engine = self._pick_engine(task)
+                engine.cancel_event.clear()
+                engine.task_id = task.id
+                self._running[task.id] = task
+
+            try:
+                engine.conn.send((task.id, task.algorithm, task.fen, task.moves, task.session_id, task.options))
+            except (BrokenPipeError, OSError) as e:
+                with self._cond:
+                    self._running.pop(task.id, None)
+                task.future.set_exception(RuntimeError(f"Search worker unavailable: {e}"))
+
+    # Task sesi diarahkan ke proses yang sudah menyimpan state engine sesi tersebut
+    def _pick_engine(self, task):
+        engine = self._idle[-1]
+        if task.session_id:
+            for candidate in self._idle:
+                if task.session_id in candidate.sessions:
+                    engine = candidate
+                    break
+            if len(engine.sessions) >= 4096:
+                engine.sessions.clear()
+            engine.sessions.add(task.session_id)
+        self._idle.remove(engine)
+        return engine
+
+    def submit(self, algorithm, fen, options, deadline, moves=None, session_id=None, on_info=None):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Search pool is closed")
+            if self.failure is not None:
+                raise SearchUnavailable(self.failure)
+            # Backpressure: tolak jika semua worker sibuk dan antrian penuh
+            if not self._idle and len(self._pending) >= self._max_pending:
+                raise SearchBusy()
+
+            task = SearchTask(next(self._ids), algorithm, fen, moves, session_id, options, deadline, on_info)
+            self._pending.append(task)
+            self._cond.notify_all()
+            return task
+
+    # Stop kooperatif: task di antrian dibatalkan, task yang berjalan diminta berhenti (hasil tetap dikirim).
+    # Return True jika task sedang berjalan dan hasilnya masih akan datang.
+    def stop(self, task):
+        with self._cond:
+            if task.future.cancel():
+                self._dequeue(task)
+                return False
+
+            for engine in self._engines:
+                if engine.task_id == task.id:
+                    engine.cancel_event.set()
+                    return True
+            return False
+
+    # Future yang sudah dibatalkan tetap bisa di-cancel() ulang (stop lalu cancel saat deadline), tapi task
+    # hanya ada sekali di antrian
+    def _dequeue(self, task):
+        if task in self._pending:
+            self._pending.remove(task)
+
+    # Stop paksa: proses engine dimatikan dan diganti proses baru
+    def cancel(self, task):
+        with self._cond:
+            if task.future.cancel():
+                self._dequeue(task)
+                return
+
+            if self._running.pop(task.id, None) is None:
+                return
+
+            # Hentikan proses yang sedang menjalankan task, lalu ganti dengan proses baru
+            for engine in self._engines:
+                if engine.task_id == task.id:
+                    self._retire(engine)
+                    break
+            self._cond.notify_all()
+
+        if not task.future.done():
+            task.future.set_exception(SearchCancelled())
+
+    # Task yang di-stop saat masih di antrian belum punya hasil: dilaporkan sebagai SearchCancelled
+    def wait(self, task, is_disconnected=None, poll_interval=0.05):
+        try:
+            return self._wait(task, is_disconnected, poll_interval)
+        except CancelledError:
+            raise SearchCancelled() from None
+
+    def _wait(self, task, is_disconnected, poll_interval):
+        while True:
+            remaining = task.deadline - time.monotonic()
+            if remaining <= 0 and task.future.done():
+                return task.future.result()
+            if remaining <= 0:
+                # Deadline: minta engine berhenti dan pakai hasil terbaik sejauh ini jika datang dalam grace period
+                if self.stop(task):
+                    try:
+                        return task.future.result(timeout=stop_grace())
+                    except FutureTimeoutError:
+                        pass
+                self.cancel(task)
+                raise SearchTimeout()
+
+            try:
+                return task.future.result(timeout=min(poll_interval, remaining))
+            except FutureTimeoutError:
+                pass
+
+            if is_disconnected is not None and is_disconnected():
+                # Client sudah pergi: hasil tidak ditunggu, engine dimatikan hanya jika tidak berhenti sendiri
+                if self.stop(task):
+                    timer = threading.Timer(stop_grace(), self._cancel_if_running, args=(task,))
+                    timer.daemon = True
+                    timer.start()
+                raise SearchCancelled()
+
+    # Tunggu sampai semua proses engine selesai warmup; False jika timeout
+    def wait_ready(self, timeout=None):
+        with self._cond:
+            ready = self._cond.wait_for(
+                lambda: self._closed or self.failure is not None or all(engine.ready for engine in self._engines),
+                timeout)
+            if self.failure is not None:
+                raise SearchUnavailable(self.failure)
+            return ready
+
+    # Error warmup dari proses engine yang masih hidup, None jika semua warmup berhasil
+    def warmup_error(self):
+        with self._cond:
+            return next((engine.warmup_error for engine in self._engines if engine.warmup_error), None)
+
+    def _cancel_if_running(self, task):
+        if not task.future.done():
+            self.cancel(task)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "ready": sum(engine.ready for engine in self._engines),
+                "idle": len(self._idle),
+                "running": len(self._running),
+                "pending": len(self._pending),
+                "max_pending": self._max_pending,
+                "startup_failures": self._startup_failures,
+                "failed": int(self.failure is not None),
+                "warmup_failed": sum(engine.warmup_error is not None for engine in self._engines),
+            }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            engines = list(self._engines)
+
+        for engine in engines:
+            try:
+                engine.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            engine.process.join(timeout=1)
+            if engine.process.is_alive():
+                engine.process.terminate()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Pool dibuat lazily per proses HTTP (setelah fork gunicorn), None jika search dijalankan inline
+def get_search_pool():
+    global _pool
+
+    if _pool is None and search_workers() > 0:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SearchPool(search_workers(), search_queue_size(), warmup=warmup_enabled())
+                atexit.register(_pool.close)
+
+    return _pool
+
+# Cek apakah client sudah menutup koneksi (dev server werkzeug atau gunicorn)
+def client_disconnected(environ):
+    sock = environ.get('werkzeug.socket') or environ.get('gunicorn.socket')
+    if sock is None:
+        return False
+
+    try:
+        return sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b''
+    except (BlockingIOError, InterruptedError):
+        return False
+    except OSError:
+        return True
+
+def _stored_result(algorithm, entry, mirrored):
+    result = {
+        'mate': False,
+        'best_move': orient_uci(entry['best_move'], mirrored),
+        'evaluation': entry['score'],
+        'nodes_explored': entry['nodes'],
+        'mate_in': entry['mate_in'],
+        'time': 0.0,
+        'cached': True,
+    }
+    result['iterations' if algorithm == 'mcts' else 'depth'] = entry['depth']
+    return result
+
+# Key engine di store: opsi yang mengubah hasil search ikut jadi bagian key (MCTS: mode rollout,
+# "default" = rollout default engine)
+def store_engine_key(algorithm, options):
+    if algorithm == 'mcts':
+        return f"mcts:{options.get('rollout') or 'default'}"
+    return algorithm
+
+def _store_result(store, position, mirrored, algorithm, engine_key, result):
+    # Hasil search yang dipotong (deadline, stop) tidak disimpan. MCTS normalnya berhenti di time_limit
+    # ('time'), hasilnya tetap disimpan dengan jumlah iterasi sebagai ukuran kualitas
+    stopped = result.get('stopped')
+    if algorithm == 'mcts' and stopped == 'time':
+        stopped = None
+    if result.get('error') or result.get('mate') or stopped or not result.get('best_move'):
+        return
+    depth = result.get('iterations' if algorithm == 'mcts' else 'depth') or 0
+    store.save(position, engine_key, orient_uci(result['best_move'], mirrored), result.get('evaluation'), depth,
+               result.get('mate_in'), result.get('nodes_explored'))
+
+# on_info dipanggil dengan hasil sementara (per depth / berkala) selama search berjalan
+def search(algorithm, fen, options, deadline=None, is_disconnected=None, moves=None, session_id=None, on_info=None):
+    # Store persisten dicek sebelum search; dilewati untuk request profiling atau jika client meminta cache: false
+    store = None
+    if algorithm in STORE_MIN_DEPTH and options.get('cache', True) and not (options.get('profile') or options.get('cprofile')):
+        store = get_analysis_store()
+
+    if store is not None:
+        engine_key = store_engine_key(algorithm, options)
+        position, mirrored = analysis_position(fen, moves)
+        try:
+            entry = store.lookup(position, engine_key, STORE_MIN_DEPTH[algorithm])
+        except sqlite3.Error:
+            entry = None
+        if entry is not None:
+            return _stored_result(algorithm, entry, mirrored)
+
+    deadline = deadline if deadline is not None else default_deadline()
+    expires_at = time.monotonic() + deadline
+    options = dict(options, time_limit=min(DEFAULT_TIME_LIMIT, max(0.1, deadline - 0.5)), stream=on_info is not None)
+
+    pool = get_search_pool()
+    if pool is None:
+        # Inline: disconnect dicek langsung oleh engine lewat SearchControl
+        cancel_event = threading.Event()
+        stopper = cancel_event.set
+        _register_search(session_id, stopper)
+        try:
+            result = run_search(algorithm, fen, options, moves, session_id, on_info, cancel_event, is_disconnected)
+        finally:
+            _unregister_search(session_id, stopper)
+        if result.get('stopped') == 'cancelled' and is_disconnected is not None and is_disconnected():
+            raise SearchCancelled()
+    else:
+        task = pool.submit(algorithm, fen, options, expires_at, moves, session_id, on_info)
+        stopper = lambda: pool.stop(task)
+        _register_search(session_id, stopper)
+        try:
+            result = pool.wait(task, is_disconnected)
+        finally:
+            _unregister_search(session_id, stopper)
+
+    if 'profile' in result:
+        record_profile(result['profile'])
+
+    # Store gagal (disk penuh, database terkunci) tidak boleh menggagalkan solve
+    if store is not None:
+        try:
+            _store_result(store, position, mirrored, algorithm, engine_key, result)
+        except sqlite3.Error:
+            pass
+    return result
+
+# Analisis satu posisi upload bulk lewat pool (inline jika pool dimatikan), dibatasi analysis_deadline()
+def analyze(fen, exact=False, deadline=None):
+    deadline = deadline if deadline is not None else analysis_deadline()
+    options = {'exact': exact, 'time_limit': max(0.1, deadline - 0.5)}
+
+    pool = get_search_pool()
+    if pool is None:
+        return run_analysis(fen, options)
+    return pool.wait(pool.submit(ANALYSIS, fen, options, time.monotonic() + deadline))
+
+# Search yang sedang berjalan per sesi, untuk stop dari API
+_active_searches = {}
+_active_searches_lock = threading.Lock()
+
+def _register_search(session_id, stopper):
+    if session_id:
+        with _active_searches_lock:
+            _active_searches[session_id] = stopper
+
+def _unregister_search(session_id, stopper):
+    if session_id:
+        with _active_searches_lock:
+            if _active_searches.get(session_id) is stopper:
+                del _active_searches[session_id]
+
+# Minta search sesi berhenti; request solve yang menunggu menerima hasil terbaik sejauh ini
+def stop_search(session_id):
+    with _active_searches_lock:
+        stopper = _active_searches.get(session_id)
+    if stopper is None:
+        return False
+    stopper()
+    return True
+
+# Alasan pool rusak untuk /api/health, None jika sehat atau search berjalan inline
+def search_pool_failure():
+    pool = _pool
+    return pool.failure if pool is not None else None
+
+def search_pool_warmup_error():
+    pool = _pool
+    return pool.warmup_error() if pool is not None else None
+
+def search_pool_stats():
+    pool = _pool
+    return pool.stats() if pool is not None else {"workers": 0}
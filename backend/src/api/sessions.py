@@ -0,0 +1,115 @@
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+
+import chess
+
+from core.chess_rules import lookup_mate_info
+from core.symmetry import canonical_key
+
+# Sesi game di server: board dengan history move dan cache mate_info per posisi
+MATE_INFO_PER_SESSION = 256
+
+# Sesi sedang dipakai request/pesan lain (dibalas 409)
+class SessionBusy(Exception):
+    pass
+
+class GameSession:
+    def __init__(self, session_id, fen):
+        self.id = session_id
+        self.lock = threading.Lock()
+        self.reset(fen)
+
+    def reset(self, fen):
+        self.board = chess.Board(fen)
+        self.mate_info = OrderedDict()
+
+    # Satu request per sesi pada satu waktu: validate -> push -> search -> push berjalan di bawah lock.
+    # Board disinkronkan ulang jika FEN dari client berbeda dengan board sesi.
+    @contextmanager
+    def use(self, fen=None):
+        if not self.lock.acquire(blocking=False):
+            raise SessionBusy(self.id)
+        try:
+            if fen and self.board.fen() != fen:
+                self.reset(fen)
+            yield self
+        finally:
+            self.lock.release()
+
+    # Posisi untuk search: FEN awal + daftar move, supaya engine tetap punya history (repetisi)
+    def search_position(self):
+        root = self.board.root()
+        return root.fen(), [move.uci() for move in self.board.move_stack]
+
+    def mate_info_for(self, board):
+        key = canonical_key(board)[0]
+        cached = self.mate_info.get(key)
+        if cached is None:
+            cached = lookup_mate_info(board)
+            self.mate_info[key] = cached
+            if len(self.mate_info) > MATE_INFO_PER_SESSION:
+                self.mate_info.popitem(last=False)
+        else:
+            self.mate_info.move_to_end(key)
+        return dict(cached)
+
+    def approximate_bytes(self):
+        return 1024 + len(self.board.move_stack) * 128 + len(self.mate_info) * 256
+
+class SessionStore:
+    def __init__(self, max_sessions=1024, max_bytes=16 * 1024 * 1024):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def create(self, fen):
+        session = GameSession(uuid.uuid4().hex, fen)
+        with self._lock:
+            self._sessions[session.id] = session
+            self._evict()
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    # Ambil sesi dari id; buat ulang jika tidak dikenal (misal request mendarat di worker lain).
+    # Board sesi hanya diubah di dalam use_session()
+    def resolve(self, session_id, fen):
+        if not session_id:
+            return None
+
+        session = self.get(session_id)
+        if session is None:
+            return self.create(fen) if fen else None
+        return session
+
+    def _evict(self):
+        # LRU: buang sesi paling lama tidak dipakai jika melewati batas jumlah atau memori
+        total = sum(session.approximate_bytes() for session in self._sessions.values())
+        while self._sessions and (len(self._sessions) > self.max_sessions or total > self.max_bytes):
+            _, session = self._sessions.popitem(last=False)
+            total -= session.approximate_bytes()
+
+# Lock sesi untuk satu request; request tanpa sesi memakai board sendiri dan tidak butuh lock
+def use_session(session, fen=None):
+    return session.use(fen) if session is not None else nullcontext()
+
+sessions = SessionStore(
+    max_sessions=int(os.environ.get("KPK_MAX_SESSIONS", 1024)),
+    max_bytes=int(os.environ.get("KPK_SESSION_MB", 16)) * 1024 * 1024,
+)
@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+
+# Warmup saat startup: tabel engine dibangun dan beberapa search kecil dijalankan (di setiap proses engine,
+# atau inline jika pool dimatikan) supaya request pertama tidak membayar import engine, build tabel, dan
+# cache first-call. /api/health baru melaporkan sehat setelah warmup selesai.
+WARMUP_POSITIONS = (
+    "8/8/8/4k3/8/8/1P6/1K6 w - - 0 1",
+    "8/8/8/8/3k4/8/4PK2/8 b - - 0 1",
+    "6k1/8/5K2/5P2/8/8/8/8 w - - 0 1",
+)
+
+# Work tetap (bukan waktu) supaya durasi warmup tidak bergantung pada beban mesin
+WARMUP_SEARCHES = (
+    ('mabp', {'depth': 3}),
+    ('iterative_deepening', {'max_depth': 3, 'time_limit': None}),
+    ('mcts', {'max_iterations': 100, 'time_limit': None, 'seed': 0, 'rollout': 'static'}),
+)
+
+def warmup_enabled():
+    return os.environ.get("KPK_WARMUP", "1").lower() not in ("0", "false", "no", "off")
+
+# Jumlah posisi dari WARMUP_POSITIONS yang di-search per engine (0: hanya tabel)
+def warmup_searches():
+    return min(int(os.environ.get("KPK_WARMUP_SEARCHES", len(WARMUP_POSITIONS))), len(WARMUP_POSITIONS))
+
+def warmup_timeout():
+    return float(os.environ.get("KPK_WARMUP_TIMEOUT", 60.0))
+
+def warm_tables():
+    from core.chess_rules import legal_move_map
+    from core.kpk_bitbase import get_bitbase
+    from core.position_index import get_legality_table, get_position_index
+
+    get_legality_table()
+    get_position_index()
+    for fen in WARMUP_POSITIONS:
+        legal_move_map(fen, with_mate_info=True)
+
+    if os.environ.get("KPK_PRELOAD_BITBASE", "0").lower() in ("1", "true", "yes"):
+        get_bitbase()
+
+# Dijalankan di proses yang akan menjalankan search: import engine + tabel evaluation, lalu search kecil
+def warm_engines():
+    from api.search_service import load_engine
+
+    warm_tables()
+    for algorithm, kwargs in WARMUP_SEARCHES:
+        engine = load_engine(algorithm)
+        for fen in WARMUP_POSITIONS[:warmup_searches()]:
+            engine(fen, **kwargs)
+
+_status = {"state": "idle"}
+_status_lock = threading.Lock()
+_done = threading.Event()
+
+def _set_status(**fields):
+    with _status_lock:
+        _status.update(fields)
+
+def run_warmup():
+    from api.search_service import get_search_pool
+
+    started = time.monotonic()
+    _set_status(state="running", error=None)
+    try:
+        warm_tables()
+        pool = get_search_pool()
+        if pool is None:
+            warm_engines()
+        elif not pool.wait_ready(warmup_timeout()):
+            raise RuntimeError("Search workers not ready after warmup timeout")
+        elif pool.warmup_error() is not None:
+            raise RuntimeError(f"Search engine warmup failed: {pool.warmup_error()}")
+        _set_status(state="ready")
+    except Exception as e:
+        # Warmup gagal tidak menahan worker selamanya: worker tetap melayani request (cold)
+        _set_status(state="failed", error=str(e))
+    finally:
+        _set_status(seconds=round(time.monotonic() - started, 3))
+        _done.set()
+
+# Dipanggil sekali per proses HTTP (post_worker_init gunicorn atau dev server); warmup berjalan di
+# background thread supaya worker bisa menjawab /api/health selama warmup
+def start_warmup(background=True):
+    with _status_lock:
+        if _status["state"] != "idle" or not warmup_enabled():
+            return
+        _status["state"] = "running"
+
+    if background:
+        threading.Thread(target=run_warmup, name="warmup", daemon=True).start()
+    else:
+        run_warmup()
+
+def wait_warmup(timeout=None):
+    return warmup_ready() or _done.wait(timeout)
+
+def warmup_status():
+    with _status_lock:
+        return dict(_status)
+
+# Proses yang tidak menjalankan warmup (test client, tool) dianggap siap
+def warmup_ready():
+    return warmup_status()["state"] != "running"
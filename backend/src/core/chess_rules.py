@@ -1,48 +1,35 @@
 import chess
 import random
+import threading
+from collections import OrderedDict
+from .instrumentation import count, timed
+from .search_control import SearchStopped, unwind
+from .symmetry import canonical_fen, canonical_key, mirror_square_name, mirror_uci
+from .position_index import (
+    VALID_STALEMATE, board_from_squares, is_legal_squares, kpk_squares, random_start_squares, start_position_flag,
+    start_position_squares,
+)
 
-def validate_board(board):
-    try:
-        pieces = board.piece_map()
-        # print(pieces)
-
-        # Menghitung jumlah setiap komponen catur
-        piece_count = {}
-        for piece in pieces.values():
-            key = f"{piece.color}_{piece.piece_type}"
-            piece_count[key] = piece_count.get(key, 0) + 1
-        
-        required_pieces = {
-            f"{chess.WHITE}_{chess.KING}": 1,
-            f"{chess.WHITE}_{chess.PAWN}": 1,
-            f"{chess.BLACK}_{chess.KING}": 1,
-        }
+MATE_INFO_CACHE_SIZE = 4096
+LEGAL_MOVE_CACHE_SIZE = 1024
 
-        # Validasi jumlah per komponen catur
-        for piece_key, expected_count in required_pieces.items():
-            if piece_count.get(piece_key, 0) != expected_count:
-                return False
+_mate_info_cache = OrderedDict()
+_mate_info_lock = threading.Lock()
+_legal_move_cache = OrderedDict()
+_legal_move_lock = threading.Lock()
 
-        # Validasi jumlah total komponen catur
-        total_pieces = sum(piece_count.values())
-        if total_pieces != 3:
-            return False
-        
-        # Validasi posisi king
-        white_king = board.king(chess.WHITE)
-        black_king = board.king(chess.BLACK)
-        
-        if white_king and black_king:
-            king_distance = max(
-                abs(chess.square_file(white_king) - chess.square_file(black_king)),
-                abs(chess.square_rank(white_king) - chess.square_rank(black_king))
-            )
-            if king_distance < 2:
-                return False
-        
-        return True
-    except:
+# Validasi O(1): board harus tepat King + Pawn vs King, lalu dicek di tabel legalitas (wk, wp, bk, side)
+def validate_board(board):
+    squares = kpk_squares(board)
+    if squares is None:
         return False
+    return is_legal_squares(*squares, board.turn)
+
+# Engine menerima FEN atau chess.Board (board sesi lengkap dengan history move)
+def load_board(position):
+    if isinstance(position, chess.Board):
+        return position.copy()
+    return chess.Board(position)
 
 def apply_move(fen, move_uci):
     try:
@@ -66,43 +53,31 @@ def apply_move(fen, move_uci):
         print(f"Apply move error: {e}")
         return chess.Board(fen), False
 
-def randomize_board():
-    while True:
-        try:
-            # Inisialisasi papan catur
-            board = chess.Board()
-            board.clear_board()
-            
-            # Memilih 3 square acak
-            available_squares = list(range(64))
-            selected_squares = random.sample(available_squares, 3)
-            
-            # Menempatkan komponen catur
-            white_king_square = selected_squares[0]
-            white_pawn_square = selected_squares[1] 
-            black_king_square = selected_squares[2]
-            
-            # Validasi posisi bidak
-            pawn_rank = chess.square_rank(white_pawn_square)
-            if pawn_rank == 0 or pawn_rank == 7:
-                continue
-            
-            board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-            board.set_piece_at(white_pawn_square, chess.Piece(chess.PAWN, chess.WHITE))
-            board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-            
-            # Black (Gukesh) to move
-            board.turn = chess.BLACK
+# Sama seperti apply_move, tapi langsung pada board yang sudah ada (tanpa parse FEN ulang)
+def push_move(board, move_uci):
+    try:
+        move = chess.Move.from_uci(move_uci)
+    except ValueError:
+        return False
 
-            board.fullmove_number = 1
-            board.halfmove_clock = 0
-            
-            if validate_board(board) and not board.is_check():
-                return board
-        except:
-            continue
+    if move not in board.legal_moves:
+        return False
 
-def mate_search(board, max_depth=5):
+    board.push(move)
+    return True
+
+def randomize_board(rng=random):
+    # Sampling langsung dari index posisi awal yang valid (tanpa rejection loop)
+    white_king_square, white_pawn_square, black_king_square = random_start_squares(rng)
+    return board_from_squares(white_king_square, white_pawn_square, black_king_square)
+
+@timed("move_generation")
+def generate_legal_moves(board):
+    return list(board.legal_moves)
+
+# control (SearchControl, opsional): search dihentikan jika deadline/cancel tercapai, hasil = tidak ada mate
+@timed("mate_search")
+def mate_search(board, max_depth=5, control=None):
     # Kondisi jika checkmate
     if board.is_checkmate():
         winner = "AI Magnus"
@@ -115,11 +90,7 @@ def mate_search(board, max_depth=5):
     
     # Kondisi jika draw
     if board.is_stalemate():
-        return {
-            "mate_in": None,
-            "for_side": None,
-            "status": "Stalemate - Draw"
-        }
+        return stalemate_info()
     
     # Kondisi jika insufficient material
     if board.is_insufficient_material():
@@ -129,9 +100,14 @@ def mate_search(board, max_depth=5):
             "status": "Insufficient Material - Draw"
         }
     
+    ply = len(board.move_stack)
     for depth in range(1, max_depth + 1):
         if board.turn == chess.WHITE:
-            mate_moves = search_forced_mate(board, depth, True)
+            try:
+                mate_moves = search_forced_mate(board, depth, True, control)
+            except SearchStopped:
+                unwind(board, ply)
+                break
             if mate_moves is not None:
                 return {
                     "mate_in": mate_moves,
@@ -141,15 +117,118 @@ def mate_search(board, max_depth=5):
                 }
     
     # Jika tidak terjadi apa"
+    return game_continues_info()
+
+def stalemate_info():
+    return {
+        "mate_in": None,
+        "for_side": None,
+        "status": "Stalemate - Draw"
+    }
+
+def game_continues_info():
     return {
         "mate_in": None,
         "for_side": None,
         "status": "Game Continues"
     }
 
+# Lookup mate_info: posisi awal dari index, posisi lain dari cache hasil mate_search
+# Hasil mate_search yang dipotong control (deadline/cancel) tidak masuk cache
+def lookup_mate_info(board, max_depth=5, control=None):
+    squares = start_position_squares(board)
+    if squares is not None:
+        flag = start_position_flag(*squares)
+        if flag:
+            count("mate_info_index_hits")
+            return stalemate_info() if flag == VALID_STALEMATE else game_continues_info()
+
+    # Posisi dan mirror-nya (a <-> h) punya mate_info yang sama
+    key = (canonical_key(board)[0], max_depth)
+    with _mate_info_lock:
+        cached = _mate_info_cache.get(key)
+        if cached is not None:
+            _mate_info_cache.move_to_end(key)
+            count("mate_info_cache_hits")
+            return dict(cached)
+
+    count("mate_info_cache_misses")
+    mate_info = mate_search(board, max_depth, control)
+    if control is not None and control.stopped:
+        return mate_info
+
+    with _mate_info_lock:
+        _mate_info_cache[key] = mate_info
+        if len(_mate_info_cache) > MATE_INFO_CACHE_SIZE:
+            _mate_info_cache.popitem(last=False)
+
+    return dict(mate_info)
+
+# Peta legal move satu posisi (from-square -> daftar to-square), di-cache per FEN kanonik
+# Entry cache dipakai bersama antar request, jangan diubah oleh pemanggil
+def legal_move_map(fen, with_mate_info=False):
+    canonical, mirrored = canonical_fen(fen)
+    entry = _cached_legal_move_map(canonical, with_mate_info)
+    return _mirror_legal_move_map(entry) if mirrored else entry
+
+def _cached_legal_move_map(fen, with_mate_info):
+    with _legal_move_lock:
+        entry = _legal_move_cache.get(fen)
+        if entry is not None:
+            _legal_move_cache.move_to_end(fen)
+
+    if entry is not None and (not with_mate_info or "next_mate_info" in entry):
+        count("legal_move_cache_hits")
+        return entry
+
+    count("legal_move_cache_misses")
+    board = chess.Board(fen)
+    legal_moves = list(board.legal_moves)
+
+    if entry is None:
+        moves = {}
+        for move in legal_moves:
+            destinations = moves.setdefault(chess.square_name(move.from_square), [])
+            to_square = chess.square_name(move.to_square)
+            # Promosi menghasilkan beberapa move ke square yang sama
+            if to_square not in destinations:
+                destinations.append(to_square)
+        entry = {"legal_moves": [move.uci() for move in legal_moves], "moves": moves}
+
+    if with_mate_info:
+        # mate_info posisi setelah setiap move, supaya UI tidak perlu request lagi setelah move
+        next_mate_info = {}
+        for move in legal_moves:
+            board.push(move)
+            next_mate_info[move.uci()] = lookup_mate_info(board)
+            board.pop()
+        entry = dict(entry, next_mate_info=next_mate_info)
+
+    with _legal_move_lock:
+        _legal_move_cache[fen] = entry
+        _legal_move_cache.move_to_end(fen)
+        if len(_legal_move_cache) > LEGAL_MOVE_CACHE_SIZE:
+            _legal_move_cache.popitem(last=False)
+
+    return entry
+
+def _mirror_legal_move_map(entry):
+    mirrored = {
+        "legal_moves": [mirror_uci(uci) for uci in entry["legal_moves"]],
+        "moves": {
+            mirror_square_name(square): [mirror_square_name(target) for target in targets]
+            for square, targets in entry["moves"].items()
+        },
+    }
+    if "next_mate_info" in entry:
+        mirrored["next_mate_info"] = {mirror_uci(uci): info for uci, info in entry["next_mate_info"].items()}
+    return mirrored
+
 # Fungsi untuk mencari forced mate menggunakan minimax
-def search_forced_mate(board, max_depth, is_attacker_turn):
+def search_forced_mate(board, max_depth, is_attacker_turn, control=None):
     def mate_minimax(board, depth, is_maximizing):
+        if control is not None:
+            control.tick()
 
         # Base case jika checkmate ditemukan
         if board.is_checkmate():
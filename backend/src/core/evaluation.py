@@ -1,11 +1,81 @@
+import json
+import os
+
 import chess
+from .instrumentation import timed
+from .position_index import kpk_squares
+
+# Tabel evaluation KPK hasil tuning offline (tools/tune_evaluation.py) terhadap solver exhaustive.
+# Model linear atas fitur one-hot dalam orientasi kanonik (pawn di file a-d):
+# - pawn: square pawn x side to move
+# - white_king: posisi white king relatif terhadap pawn x rank pawn
+# - black_king: posisi black king relatif terhadap pawn x rank pawn x rook file x side to move
+# - kings: posisi black king relatif terhadap white king (oposisi) x side to move
+FEATURE_TABLES = (("pawn", 2 * 64), ("white_king", 8 * 225), ("black_king", 32 * 225), ("kings", 2 * 225))
+TABLE_SIZE = sum(size for _, size in FEATURE_TABLES)
+TABLE_OFFSETS = [sum(size for _, size in FEATURE_TABLES[:i]) for i in range(len(FEATURE_TABLES))]
+
+DEFAULT_WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'kpk_evaluation.json')
+
+def kpk_feature_indices(wk, wp, bk, white_to_move):
+    if wp & 7 > 3:
+        wk, wp, bk = wk ^ 7, wp ^ 7, bk ^ 7
+
+    side = 1 if white_to_move else 0
+    wp_file, wp_rank = wp & 7, wp >> 3
+    rook_file = 1 if wp_file == 0 else 0
+    white_king = ((wk & 7) - wp_file + 7) * 15 + ((wk >> 3) - wp_rank + 7)
+    black_king = ((bk & 7) - wp_file + 7) * 15 + ((bk >> 3) - wp_rank + 7)
+    kings = ((bk & 7) - (wk & 7) + 7) * 15 + ((bk >> 3) - (wk >> 3) + 7)
+
+    return (
+        TABLE_OFFSETS[0] + side * 64 + wp,
+        TABLE_OFFSETS[1] + wp_rank * 225 + white_king,
+        TABLE_OFFSETS[2] + ((side * 2 + rook_file) * 8 + wp_rank) * 225 + black_king,
+        TABLE_OFFSETS[3] + side * 225 + kings,
+    )
 
+# Tabel di-flatten sesuai urutan FEATURE_TABLES
+def load_evaluation_table(path):
+    with open(path) as file:
+        data = json.load(file)
+
+    weights = []
+    for name, size in FEATURE_TABLES:
+        table = data["tables"][name]
+        if len(table) != size:
+            raise ValueError(f"Tabel evaluation '{name}' harus berisi {size} nilai")
+        weights.extend(table)
+    return {"weights": weights, "scale": data["scale"]}
+
+# Dimuat sekali saat startup; env KPK_EVAL_WEIGHTS kosong = pakai evaluation hand-written
+def _load_default_table():
+    path = os.environ.get("KPK_EVAL_WEIGHTS", DEFAULT_WEIGHTS_PATH)
+    if not path or not os.path.exists(path):
+        return None
+    return load_evaluation_table(path)
+
+_evaluation_table = _load_default_table()
+
+# Prediksi tabel (0 = draw, 1 = win cepat) diskalakan ke centipawn, di bawah nilai queen
+def tuned_kpk_score(wk, wp, bk, white_to_move, table=None):
+    table = table or _evaluation_table
+    weights = table["weights"]
+    value = sum(weights[index] for index in kpk_feature_indices(wk, wp, bk, white_to_move))
+    return round(table["scale"] * min(1.0, max(0.0, value)))
+
+@timed("evaluate_board")
 def evaluate_board(board):
     if board.is_checkmate():
         return -9000 if board.turn == chess.WHITE else 9000
     
     if board.is_stalemate() or board.is_insufficient_material():
         return 0
+
+    if _evaluation_table is not None:
+        squares = kpk_squares(board)
+        if squares is not None:
+            return tuned_kpk_score(*squares, board.turn == chess.WHITE)
     
     score = 0
 
@@ -36,7 +106,7 @@ def evaluate_king_position(board):
     white_king_square = board.king(chess.WHITE)
     black_king_square = board.king(chess.BLACK)
 
-    if white_king_square and black_king_square:
+    if white_king_square is not None and black_king_square is not None:
         # Advantage jika posisi raja di tengah
         white_king_center_distance = abs(chess.square_file(white_king_square) - 3.5) + abs(chess.square_rank(white_king_square) - 3.5)
         black_king_center_distance = abs(chess.square_file(black_king_square) - 3.5) + abs(chess.square_rank(black_king_square) - 3.5)
@@ -70,11 +140,11 @@ def evaluate_king_pawn_support(board):
     
     # Posisi king dari masing-masing warna terhadap pawn
     for pawn_square in board.pieces(chess.PAWN, chess.WHITE):
-        if white_king_square:
+        if white_king_square is not None:
             white_king_pawn_distance = abs(chess.square_file(white_king_square) - chess.square_file(pawn_square)) + abs(chess.square_rank(white_king_square) - chess.square_rank(pawn_square))
             score += max(0, 8 - white_king_pawn_distance) * 5
         
-        if black_king_square:
+        if black_king_square is not None:
             black_king_pawn_distance = abs(chess.square_file(black_king_square) - chess.square_file(pawn_square)) + abs(chess.square_rank(black_king_square) - chess.square_rank(pawn_square))
             score += black_king_pawn_distance * 3
     
@@ -101,6 +171,7 @@ def get_piece_value(piece_type):
     }
     return values.get(piece_type, 0)
 
+@timed("order_moves")
 def order_moves(board, legal_moves):
     move_scores = []
     
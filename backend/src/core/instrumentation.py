@@ -0,0 +1,161 @@
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Instrumentasi opt-in: counter dan timer per fase search, hanya aktif di thread yang sedang di-profile
+_local = threading.local()
+
+_metrics_lock = threading.Lock()
+_phase_seconds = defaultdict(float)
+_phase_calls = defaultdict(int)
+_event_counts = defaultdict(int)
+_request_seconds = defaultdict(float)
+_request_counts = defaultdict(int)
+_request_errors = defaultdict(int)
+
+class SearchProfile:
+    def __init__(self):
+        self.counters = defaultdict(int)
+        self.phase_seconds = defaultdict(float)
+        self.phase_calls = defaultdict(int)
+        self.cprofile = None
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def add_phase(self, name, elapsed):
+        self.phase_seconds[name] += elapsed
+        self.phase_calls[name] += 1
+
+    def to_dict(self):
+        result = {
+            "counters": dict(self.counters),
+            "phases": {
+                name: {"seconds": self.phase_seconds[name], "calls": self.phase_calls[name]}
+                for name in self.phase_seconds
+            },
+        }
+        if self.cprofile:
+            result["cprofile"] = self.cprofile
+        return result
+
+def current_profile():
+    return getattr(_local, "profile", None)
+
+def count(name, amount=1):
+    profile = getattr(_local, "profile", None)
+    if profile is not None:
+        profile.counters[name] += amount
+
+def instrumentation_enabled():
+    return os.environ.get("KPK_INSTRUMENTATION", "0").lower() in ("1", "true", "yes")
+
+# Timer per fase dipasang saat import (env KPK_PHASE_TIMERS atau KPK_INSTRUMENTATION); jika mati, fungsi
+# hot-path tidak dibungkus sama sekali sehingga search tanpa profiling tidak membayar overhead per node
+def phase_timers_enabled():
+    return instrumentation_enabled() or os.environ.get("KPK_PHASE_TIMERS", "0").lower() in ("1", "true", "yes")
+
+PHASE_TIMERS = phase_timers_enabled()
+
+# Decorator untuk fungsi hot-path; timer hanya berjalan di thread dengan profile aktif
+def timed(phase):
+    def decorator(func):
+        if not PHASE_TIMERS:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = getattr(_local, "profile", None)
+            if profile is None:
+                return func(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.add_phase(phase, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+# Jalankan blok dengan profile aktif; hasil di-merge ke metrics global setelah selesai (kecuali record=False)
+@contextmanager
+def profiling(enabled=True, use_cprofile=False, dump_dir=None, top=25, record=True):
+    if not enabled:
+        yield None
+        return
+
+    previous = getattr(_local, "profile", None)
+    profile = SearchProfile()
+    _local.profile = profile
+
+    profiler = cProfile.Profile() if use_cprofile else None
+    if profiler:
+        profiler.enable()
+
+    try:
+        yield profile
+    finally:
+        if profiler:
+            profiler.disable()
+            profile.cprofile = _cprofile_report(profiler, dump_dir, top)
+
+        _local.profile = previous
+        if record:
+            record_profile(profile.to_dict())
+
+def _cprofile_report(profiler, dump_dir, top):
+    report = {}
+
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(top)
+    report["stats"] = stream.getvalue()
+
+    dump_dir = dump_dir or os.environ.get("KPK_PROFILE_DUMP_DIR")
+    if dump_dir:
+        os.makedirs(dump_dir, exist_ok=True)
+        path = os.path.join(dump_dir, f"solve-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{threading.get_ident()}.prof")
+        profiler.dump_stats(path)
+        report["dump"] = path
+
+    return report
+
+def record_profile(profile_dict):
+    with _metrics_lock:
+        for name, value in profile_dict.get("counters", {}).items():
+            _event_counts[name] += value
+        for name, phase in profile_dict.get("phases", {}).items():
+            _phase_seconds[name] += phase["seconds"]
+            _phase_calls[name] += phase["calls"]
+
+def record_request(endpoint, elapsed, error=False):
+    with _metrics_lock:
+        _request_seconds[endpoint] += elapsed
+        _request_counts[endpoint] += 1
+        if error:
+            _request_errors[endpoint] += 1
+
+# Export metrics dalam format text Prometheus
+def prometheus_metrics():
+    lines = []
+
+    def metric(name, kind, help_text, label, values):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for key in sorted(values):
+            lines.append(f'{name}{{{label}="{key}"}} {values[key]}')
+
+    with _metrics_lock:
+        metric("kpk_requests_total", "counter", "Jumlah request per endpoint.", "endpoint", dict(_request_counts))
+        metric("kpk_request_errors_total", "counter", "Jumlah request gagal per endpoint.", "endpoint", dict(_request_errors))
+        metric("kpk_request_seconds_total", "counter", "Total durasi request per endpoint.", "endpoint", dict(_request_seconds))
+        metric("kpk_search_phase_seconds_total", "counter", "Total waktu per fase search (inklusif).", "phase", dict(_phase_seconds))
+        metric("kpk_search_phase_calls_total", "counter", "Jumlah pemanggilan per fase search.", "phase", dict(_phase_calls))
+        metric("kpk_search_events_total", "counter", "Counter event search (cutoff, cache hit, evaluasi).", "event", dict(_event_counts))
+
+    return "\n".join(lines) + "\n"
@@ -1,16 +1,23 @@
 import chess
 import time
-from .chess_rules import mate_search
+from .chess_rules import generate_legal_moves, load_board, mate_search
+from .instrumentation import count
+from .search_control import SearchControl, SearchStopped, unwind
+from .search_state import position_key
+from .symmetry import orient_move
 from .evaluation import evaluate_board, order_moves
 
-def iterative_deepening_search(fen, max_depth=5, time_limit=7.0):
+# time_limit=None dan/atau max_nodes: mode fixed-work, hasil hanya bergantung pada posisi (bukan kecepatan mesin).
+# control: SearchControl bersama (menggantikan time_limit/max_nodes), misalnya dengan cancel event dari pool.
+def iterative_deepening_search(fen, max_depth=5, time_limit=7.0, state=None, on_info=None, max_nodes=None, control=None):
     try:
-        board = chess.Board(fen)
+        board = load_board(fen)
+        control = control or SearchControl(time_limit=time_limit, max_nodes=max_nodes)
 
         start_time = time.time()
 
         # Cek mate
-        mate_result = mate_search(board)
+        mate_result = mate_search(board, control=control)
 
         # Jika game over (checkmate, stalemate, and insufficient material)
         if board.is_game_over():
@@ -42,15 +49,20 @@ def iterative_deepening_search(fen, max_depth=5, time_limit=7.0):
         best_score = 0
         nodes_explored = 0
         depths_completed = 0
+        depth_times = []
+        # Node dari depth yang dihentikan di tengah jalan ikut dihitung untuk nodes/sec
+        search_start_nodes = control.nodes
+        ply = len(board.move_stack)
         
         # Iterative deepening loop
         for depth in range(1, max_depth + 1):
-            if (time.time() - start_time) >= time_limit:
+            if control.should_stop():
                 break
             
             try:
                 current_best_move, current_best_score, current_nodes = minimax_with_timeout(
-                    board, depth, float('-inf'), float('inf'), True, 0, start_time, time_limit
+                    board, depth, float('-inf'), float('inf'), board.turn == chess.WHITE, 0, control,
+                    state.tt if state else None, root=True
                 )
                 
                 if current_best_move is not None:
@@ -58,42 +70,82 @@ def iterative_deepening_search(fen, max_depth=5, time_limit=7.0):
                     best_score = current_best_score
                     nodes_explored += current_nodes
                     depths_completed = depth
+                    depth_times.append(time.time() - start_time)
+
+                    # Kirim hasil sementara setiap depth selesai (untuk streaming ke client)
+                    if on_info is not None:
+                        on_info({
+                            'depth': depth,
+                            'best_move': best_move.uci(),
+                            'evaluation': best_score,
+                            'nodes_explored': nodes_explored,
+                            'time': depth_times[-1],
+                        })
                 
-            except TimeoutException:
+            except SearchStopped:
+                unwind(board, ply)
+                # Belum ada depth yang selesai: pakai move terbaik sementara dari root depth pertama
+                if best_move is None:
+                    best_move, best_score = control.best_move, control.best_score or 0
                 break
+
+        # Search dipotong sebelum satu root move pun selesai: tetap kembalikan move legal
+        if best_move is None:
+            best_move = order_moves(board, generate_legal_moves(board))[0]
+            best_score = evaluate_board(board)
         
         end_time = time.time()
         time_taken = end_time - start_time
+        nodes_searched = control.nodes - search_start_nodes
         
         return {
             'mate': False,
             'best_move': best_move.uci() if best_move else None,
             'evaluation': best_score,
             'depth': depths_completed,
+            'depth_times': depth_times,
             'nodes_explored': nodes_explored,
-            'time': time_taken
+            'nodes_searched': nodes_searched,
+            'nodes_per_second': nodes_searched / time_taken if time_taken > 0 else None,
+            'time': time_taken,
+            'mate_in': mate_result.get('mate_in'),
+            'stopped': control.reason,
         }
     except Exception as e:
         return {'error': str(e), 'mate': False, 'best_move': None}
 
-class TimeoutException(Exception):
-    pass
-
-def minimax_with_timeout(board, depth, alpha, beta, maximizing_player, nodes_explored, start_time, time_limit):
-    # Check timeout
-    if (time.time() - start_time) >= time_limit:
-        raise TimeoutException()
+def minimax_with_timeout(board, depth, alpha, beta, maximizing_player, nodes_explored, control, tt=None, root=False):
+    # Deadline, batas node, dan cancel dicek lewat control (raise SearchStopped)
+    control.tick()
     
     nodes_explored += 1
     
     if depth == 0 or board.is_game_over():
         return None, evaluate_board(board), nodes_explored
     
-    legal_moves = list(board.legal_moves)
+    # Cek transposition table (jika ada state sesi)
+    key = None
+    mirrored = False
+    tt_move = None
+    if tt is not None:
+        # Key kanonik: posisi dan mirror-nya berbagi entry, move dikembalikan ke orientasi board
+        key, mirrored = position_key(board)
+        tt_value, tt_move = tt.lookup(key, depth, alpha, beta)
+        tt_move = orient_move(tt_move, mirrored)
+        if tt_value is not None:
+            count("tt_hits")
+            return tt_move, tt_value, nodes_explored
+    original_alpha = alpha
+    original_beta = beta
+
+    legal_moves = generate_legal_moves(board)
     if not legal_moves:
         return None, evaluate_board(board), nodes_explored
     
     ordered_moves = order_moves(board, legal_moves)
+    if tt_move in ordered_moves:
+        ordered_moves.remove(tt_move)
+        ordered_moves.insert(0, tt_move)
     
     best_move = None
     
@@ -102,34 +154,44 @@ def minimax_with_timeout(board, depth, alpha, beta, maximizing_player, nodes_exp
         for move in ordered_moves:
             board.push(move)
             _, current_eval, nodes_explored = minimax_with_timeout(
-                board, depth - 1, alpha, beta, False, nodes_explored, start_time, time_limit
+                board, depth - 1, alpha, beta, False, nodes_explored, control, tt
             )
             board.pop()
             
             if current_eval > max_eval:
                 max_eval = current_eval
                 best_move = move
+                if root:
+                    control.update_best(move, current_eval)
             
             alpha = max(alpha, current_eval)
             if beta <= alpha:
+                count("cutoffs")
                 break
 
+        if tt is not None:
+            tt.store(key, depth, max_eval, original_alpha, original_beta, orient_move(best_move, mirrored))
         return best_move, max_eval, nodes_explored
     else:
         min_eval = float('inf')
         for move in ordered_moves:
             board.push(move)
             _, current_eval, nodes_explored = minimax_with_timeout(
-                board, depth - 1, alpha, beta, True, nodes_explored, start_time, time_limit
+                board, depth - 1, alpha, beta, True, nodes_explored, control, tt
             )
             board.pop()
             
             if current_eval < min_eval:
                 min_eval = current_eval
                 best_move = move
+                if root:
+                    control.update_best(move, current_eval)
             
             beta = min(beta, current_eval)
             if beta <= alpha:
+                count("cutoffs")
                 break
         
+        if tt is not None:
+            tt.store(key, depth, min_eval, original_alpha, original_beta, orient_move(best_move, mirrored))
         return best_move, min_eval, nodes_explored
\ No newline at end of file
@@ -0,0 +1,207 @@
+import chess
+import threading
+from array import array
+from collections import deque
+from .position_index import KING_DISTANCE, KING_NEIGHBOURS, PAWN_ATTACKS, king_distance, kpk_squares
+
+# Solver exhaustive KPK (retrograde analysis) untuk ground truth win/draw.
+# Pawn tidak pernah pindah file, jadi cukup dihitung untuk pawn di file a-d (orientasi kanonik);
+# posisi dengan pawn di file e-h di-mirror (a <-> h) sebelum probe.
+# Index posisi: wk | (slot pawn << 6) | (bk << 11) | (white_to_move << 17), slot = rank * 4 + file
+UNKNOWN = 0
+WIN = 1
+DRAW = 2
+INVALID = 3
+
+WHITE_TO_MOVE = 1 << 17
+BLACK_KING_SHIFT = 11
+
+PAWN_SLOT = [(square >> 3) * 4 + (square & 7) if square & 7 < 4 else -1 for square in range(64)]
+
+RESULT_NAMES = {UNKNOWN: "unknown", WIN: "win", DRAW: "draw", INVALID: "invalid"}
+
+_bitbase_lock = threading.Lock()
+_results = None
+_plies = None
+
+def position_key(wk, wp, bk, white_to_move):
+    if wp & 7 > 3:
+        wk, wp, bk = wk ^ 7, wp ^ 7, bk ^ 7
+    return wk | (PAWN_SLOT[wp] << 6) | (bk << BLACK_KING_SHIFT) | (WHITE_TO_MOVE if white_to_move else 0)
+
+def _white_children(wk, wp, bk):
+    children = []
+    pawn_and_bk = (PAWN_SLOT[wp] << 6) | (bk << BLACK_KING_SHIFT)
+    distance_from_bk = KING_DISTANCE[bk]
+
+    for square in KING_NEIGHBOURS[wk]:
+        if square != wp and distance_from_bk[square] >= 2:
+            children.append(square | pawn_and_bk)
+
+    push = wp + 8
+    if push < 56 and push != wk and push != bk:
+        children.append(wk | (PAWN_SLOT[push] << 6) | (bk << BLACK_KING_SHIFT))
+        double_push = wp + 16
+        if wp < 16 and double_push != wk and double_push != bk:
+            children.append(wk | (PAWN_SLOT[double_push] << 6) | (bk << BLACK_KING_SHIFT))
+
+    return children
+
+def _safe_promotion(wk, wp, bk):
+    push = wp + 8
+    if wp < 48 or push == wk or push == bk:
+        return False
+    return KING_DISTANCE[bk][push] > 1 or KING_DISTANCE[wk][push] == 1
+
+def _black_children(wk, wp, bk, attacked_by_pawn):
+    children = []
+    king_and_pawn = wk | (PAWN_SLOT[wp] << 6) | WHITE_TO_MOVE
+    distance_from_wk = KING_DISTANCE[wk]
+
+    for square in KING_NEIGHBOURS[bk]:
+        if distance_from_wk[square] < 2 or square in attacked_by_pawn:
+            continue
+        if square == wp:
+            # Pawn tidak dijaga dan bisa di-capture
+            return None
+        children.append(king_and_pawn | (square << BLACK_KING_SHIFT))
+    return children
+
+def _solve():
+    size = WHITE_TO_MOVE << 1
+    results = bytearray([INVALID]) * size
+    plies = bytearray(size)
+    pending = array('B', bytes(size))
+    queue = deque()
+    parents = {}
+
+    for wp in range(8, 56):
+        if PAWN_SLOT[wp] < 0:
+            continue
+        attacked_by_pawn = PAWN_ATTACKS[wp]
+        for wk in range(64):
+            if wk == wp:
+                continue
+            distance_from_wk = KING_DISTANCE[wk]
+            for bk in range(64):
+                if bk == wp or bk == wk or distance_from_wk[bk] < 2:
+                    continue
+
+                black_key = wk | (PAWN_SLOT[wp] << 6) | (bk << BLACK_KING_SHIFT)
+                white_key = black_key | WHITE_TO_MOVE
+                in_check = bk in attacked_by_pawn
+
+                # White to move tidak valid jika black sedang di-check
+                if not in_check:
+                    if _safe_promotion(wk, wp, bk):
+                        results[white_key] = WIN
+                        plies[white_key] = 1
+                        queue.append(white_key)
+                    else:
+                        _add_position(white_key, _white_children(wk, wp, bk), False, results, pending, parents, queue)
+
+                _add_position(black_key, _black_children(wk, wp, bk, attacked_by_pawn), in_check, results, pending, parents, queue)
+
+    # Propagasi hasil dari posisi yang sudah diketahui ke parent-nya (BFS per ply)
+    while queue:
+        child = queue.popleft()
+        child_result = results[child]
+        for parent in parents.get(child, ()):
+            if results[parent] != UNKNOWN:
+                continue
+
+            white_to_move = parent & WHITE_TO_MOVE
+            if white_to_move:
+                if child_result == WIN:
+                    results[parent] = WIN
+                    plies[parent] = min(255, plies[child] + 1)
+                    queue.append(parent)
+                    continue
+            elif child_result == DRAW:
+                results[parent] = DRAW
+                queue.append(parent)
+                continue
+
+            pending[parent] -= 1
+            if pending[parent] == 0:
+                results[parent] = DRAW if white_to_move else WIN
+                plies[parent] = 0 if white_to_move else min(255, plies[child] + 1)
+                queue.append(parent)
+
+    # Posisi yang tidak pernah ter-resolve (siklus) adalah draw
+    results = results.replace(bytes([UNKNOWN]), bytes([DRAW]))
+
+    return results, plies
+
+def _add_position(key, children, in_check, results, pending, parents, queue):
+    if children is None:
+        results[key] = DRAW
+        queue.append(key)
+        return
+
+    if not children:
+        # Checkmate atau stalemate
+        results[key] = WIN if in_check else DRAW
+        queue.append(key)
+        return
+
+    results[key] = UNKNOWN
+    pending[key] = len(children)
+    for child in children:
+        child_parents = parents.get(child)
+        if child_parents is None:
+            parents[child] = [key]
+        else:
+            child_parents.append(key)
+
+def get_bitbase():
+    global _results, _plies
+
+    if _results is None:
+        with _bitbase_lock:
+            if _results is None:
+                results, plies = _solve()
+                _plies = plies
+                _results = results
+
+    return _results, _plies
+
+def probe_squares(wk, wp, bk, white_to_move):
+    results, plies = get_bitbase()
+    key = position_key(wk, wp, bk, white_to_move)
+    return results[key], plies[key]
+
+# Hasil exact (WIN/DRAW, jarak ply ke konversi) untuk board KPK, None jika bukan KPK
+def probe(board):
+    if board.is_checkmate():
+        return WIN if board.turn == chess.BLACK else DRAW, 0
+    if board.is_stalemate() or board.is_insufficient_material():
+        return DRAW, 0
+
+    squares = kpk_squares(board)
+    if squares is None:
+        return None
+
+    result, plies = probe_squares(*squares, board.turn == chess.WHITE)
+    if result in (UNKNOWN, INVALID):
+        return None
+    return result, plies
+
+# Hasil exact setelah move (termasuk promosi yang keluar dari KPK)
+def probe_move(board, move):
+    child = board.copy(stack=False)
+    child.push(move)
+
+    if move.promotion:
+        if child.is_stalemate():
+            return DRAW, 0
+        if child.is_checkmate():
+            return WIN, 0
+        if move.promotion not in (chess.QUEEN, chess.ROOK):
+            return DRAW, 0
+        wk = child.king(chess.WHITE)
+        bk = child.king(chess.BLACK)
+        safe = king_distance(bk, move.to_square) > 1 or king_distance(wk, move.to_square) == 1
+        return (WIN if safe else DRAW), 0
+
+    return probe(child)
@@ -1,16 +1,22 @@
 import chess
 import time
-from .chess_rules import mate_search
+from .chess_rules import generate_legal_moves, load_board, mate_search
+from .instrumentation import count
+from .search_control import SearchControl, SearchStopped, unwind
+from .search_state import position_key
+from .symmetry import orient_move
 from .evaluation import evaluate_board, order_moves
 
-def minimax_alpha_beta_pruning(fen, depth=5):
+# control: SearchControl bersama (deadline, batas node, cancel); tanpa control search berjalan sampai depth selesai
+def minimax_alpha_beta_pruning(fen, depth=5, state=None, control=None):
     try:
-        board = chess.Board(fen)
+        board = load_board(fen)
+        control = control or SearchControl()
 
         start_time = time.time()
 
         # Cek mate
-        mate_result = mate_search(board)
+        mate_result = mate_search(board, control=control)
 
         # Jika game over (checkmate, stalemate, and insufficient material)
         if board.is_game_over():
@@ -38,7 +44,21 @@ def minimax_alpha_beta_pruning(fen, depth=5):
             
             return result
         
-        best_move, best_score, nodes_explored = minimax_search(board, depth, float('-inf'), float('inf'), True, 0)
+        search_start_nodes = control.nodes
+        ply = len(board.move_stack)
+        try:
+            best_move, best_score, nodes_explored = minimax_search(
+                board, depth, float('-inf'), float('inf'), board.turn == chess.WHITE, 0, state.tt if state else None,
+                control, root=True
+            )
+        except SearchStopped:
+            # Search dipotong: pakai move terbaik dari root move yang sudah selesai dicari
+            unwind(board, ply)
+            nodes_explored = control.nodes - search_start_nodes
+            best_move, best_score = control.best_move, control.best_score
+            if best_move is None:
+                best_move = order_moves(board, generate_legal_moves(board))[0]
+                best_score = evaluate_board(board)
         
         end_time = time.time()
         time_taken = end_time - start_time
@@ -49,24 +69,47 @@ def minimax_alpha_beta_pruning(fen, depth=5):
             'evaluation': best_score,
             'depth': depth,
             'nodes_explored': nodes_explored,
-            'time': time_taken
+            'nodes_per_second': nodes_explored / time_taken if time_taken > 0 else None,
+            'time': time_taken,
+            'mate_in': mate_result.get('mate_in'),
+            'stopped': control.reason,
         }
     except Exception as e:
         return {'error': str(e), 'mate': False, 'best_move': None}
 
-def minimax_search(board, depth, alpha, beta, maximizing_player, nodes_explored):
+def minimax_search(board, depth, alpha, beta, maximizing_player, nodes_explored, tt=None, control=None, root=False):
+    if control is not None:
+        control.tick()
     nodes_explored += 1
     
     # Base case 1
     if depth == 0 or board.is_game_over():
         return None, evaluate_board(board), nodes_explored
     
-    legal_moves = list(board.legal_moves)
+    # Cek transposition table (jika ada state sesi)
+    key = None
+    mirrored = False
+    tt_move = None
+    if tt is not None:
+        # Key kanonik: posisi dan mirror-nya berbagi entry, move dikembalikan ke orientasi board
+        key, mirrored = position_key(board)
+        tt_value, tt_move = tt.lookup(key, depth, alpha, beta)
+        tt_move = orient_move(tt_move, mirrored)
+        if tt_value is not None:
+            count("tt_hits")
+            return tt_move, tt_value, nodes_explored
+    original_alpha = alpha
+    original_beta = beta
+
+    legal_moves = generate_legal_moves(board)
     # Base case 2
     if not legal_moves:
         return None, evaluate_board(board), nodes_explored
     
     ordered_moves = order_moves(board, legal_moves)
+    if tt_move in ordered_moves:
+        ordered_moves.remove(tt_move)
+        ordered_moves.insert(0, tt_move)
     
     best_move = None
     
@@ -74,31 +117,41 @@ def minimax_search(board, depth, alpha, beta, maximizing_player, nodes_explored)
         max_eval = float('-inf')
         for move in ordered_moves:
             board.push(move)
-            _, current_eval, nodes_explored = minimax_search(board, depth - 1, alpha, beta, False, nodes_explored)
+            _, current_eval, nodes_explored = minimax_search(board, depth - 1, alpha, beta, False, nodes_explored, tt, control)
             board.pop()
             
             if current_eval > max_eval:
                 max_eval = current_eval
                 best_move = move
+                if root and control is not None:
+                    control.update_best(move, current_eval)
             
             alpha = max(alpha, current_eval)
             if beta <= alpha:
+                count("cutoffs")
                 break
         
+        if tt is not None:
+            tt.store(key, depth, max_eval, original_alpha, original_beta, orient_move(best_move, mirrored))
         return best_move, max_eval, nodes_explored
     else:
         min_eval = float('inf')
         for move in ordered_moves:
             board.push(move)
-            _, current_eval, nodes_explored = minimax_search(board, depth - 1, alpha, beta, True, nodes_explored)
+            _, current_eval, nodes_explored = minimax_search(board, depth - 1, alpha, beta, True, nodes_explored, tt, control)
             board.pop()
             
             if current_eval < min_eval:
                 min_eval = current_eval
                 best_move = move
+                if root and control is not None:
+                    control.update_best(move, current_eval)
             
             beta = min(beta, current_eval)
             if beta <= alpha:
+                count("cutoffs")
                 break
         
+        if tt is not None:
+            tt.store(key, depth, min_eval, original_alpha, original_beta, orient_move(best_move, mirrored))
         return best_move, min_eval, nodes_explored
\ No newline at end of file
@@ -2,55 +2,140 @@ import chess
 import time
 import random
 import math
-from .chess_rules import mate_search
-from .evaluation import evaluate_board_for_mcts
+from .chess_rules import load_board, mate_search
+from .evaluation import evaluate_board_for_mcts, order_moves
+from .instrumentation import timed
+from .search_control import SearchControl, SearchStopped
+
+# Interval (detik) pengiriman info search sementara
+INFO_INTERVAL = 0.5
+
+# PUCT: Q + C_PUCT * prior * sqrt(N) / (1 + n), prior dari softmax evaluation posisi setelah move
+C_PUCT = 1.5
+PRIOR_TEMPERATURE = 4.0
+
+# Progressive widening: node dengan N visit boleh punya maksimal WIDENING_BASE * N^WIDENING_EXPONENT child
+WIDENING_BASE = 2.0
+WIDENING_EXPONENT = 0.5
+
+# Nilai terbukti (MCTS-Solver), dari sisi yang melangkah ke node
+PROVEN_WIN = 1
+PROVEN_DRAW = 0
+PROVEN_LOSS = -1
+PROVEN_NAMES = {PROVEN_WIN: 'win', PROVEN_DRAW: 'draw', PROVEN_LOSS: 'loss'}
+
+# 'random': rollout random ber-bias sampai game selesai, 'static': langsung evaluation statis node
+ROLLOUTS = ('random', 'static')
+DEFAULT_ROLLOUT = 'random'
 
 class MCTSNode:
-    def __init__(self, board, parent=None, move=None):
+    def __init__(self, board, parent=None, move=None, prior=1.0):
         self.board = board.copy()
         self.parent = parent
         self.move = move
+        self.prior = prior
         self.children = []
         self.visits = 0
         self.wins = 0.0
-        self.untried_moves = list(board.legal_moves)
+        # Diisi (prior, move) saat node pertama kali di-expand, urut prior naik (pop() = prior tertinggi)
+        self.untried_moves = None
+        self.terminal = self.board.is_game_over()
+
+        # MCTS-Solver: nilai exact (None = belum terbukti) dan jarak (ply) ke akhir game
+        self.proven = None
+        self.proven_plies = 0
+        if self.terminal:
+            self.proven = PROVEN_WIN if self.board.is_checkmate() else PROVEN_DRAW
         
     def is_terminal(self):
-        return self.board.is_game_over()
+        return self.terminal
     
     def is_fully_expanded(self):
+        if self.untried_moves is None:
+            self.compute_priors()
         return len(self.untried_moves) == 0
+
+    # Node boleh menambah child baru jika masih ada move dan batas progressive widening belum tercapai.
+    # Jika semua child sudah terbukti, move berikutnya langsung di-expand supaya node bisa ikut terbukti.
+    def can_expand(self):
+        if self.is_fully_expanded():
+            return False
+        if all(child.proven is not None for child in self.children):
+            return True
+        return len(self.children) < WIDENING_BASE * self.visits ** WIDENING_EXPONENT
+
+    @timed("mcts_priors")
+    def compute_priors(self):
+        moves = order_moves(self.board, list(self.board.legal_moves))
+        if not moves:
+            self.untried_moves = []
+            return
+
+        # Evaluation dari sisi yang melangkah, dinormalisasi dengan softmax
+        sign = 1 if self.board.turn == chess.WHITE else -1
+        logits = []
+        for move in moves:
+            self.board.push(move)
+            logits.append(sign * evaluate_board_for_mcts(self.board) * PRIOR_TEMPERATURE)
+            self.board.pop()
+
+        top = max(logits)
+        weights = [math.exp(logit - top) for logit in logits]
+        total = sum(weights)
+
+        # Sort stabil: prior sama tetap mengikuti urutan order_moves
+        ranked = sorted(zip((weight / total for weight in weights), moves), key=lambda item: -item[0])
+        ranked.reverse()
+        self.untried_moves = ranked
     
-    def select_child(self, c_param=1.414):
-        # UCB1 formula: (w_i / n_i) + c * sqrt(2 * ln(N) / n_i) dgn w_i: jumlah kemenangan child, n_i: jumlah kunjungan child, N: jumlah kunjungan parent
-        choices_weights = [
-            (child.wins / child.visits) + c_param * math.sqrt((2 * math.log(self.visits) / child.visits))
-            for child in self.children
-        ]
-        return self.children[choices_weights.index(max(choices_weights))]
+    @timed("mcts_selection")
+    def select_child(self, c_puct=C_PUCT):
+        # PUCT: exploitation (w_i / n_i) + exploration sebanding prior P_i dan sqrt(N) / (1 + n_i)
+        sqrt_visits = math.sqrt(self.visits)
+        best_child = None
+        best_score = float('-inf')
+        for child in self.children:
+            # Subtree yang sudah terbukti tidak perlu disampling lagi
+            if child.proven is not None:
+                continue
+            value = child.wins / child.visits if child.visits else 0.0
+            score = value + c_puct * child.prior * sqrt_visits / (1 + child.visits)
+            if score > best_score:
+                best_score = score
+                best_child = child
+        return best_child
     
+    @timed("mcts_expansion")
     def expand(self):
-        move = self.untried_moves.pop()
+        prior, move = self.untried_moves.pop()
         new_board = self.board.copy()
         new_board.push(move)
-        child = MCTSNode(new_board, parent=self, move=move)
+        child = MCTSNode(new_board, parent=self, move=move, prior=prior)
         self.children.append(child)
         return child
     
-    def simulate(self):
+    # rng: random.Random per search supaya rollout bisa direproduksi dengan seed
+    @timed("mcts_simulation")
+    def simulate(self, rollout=DEFAULT_ROLLOUT, rng=random, control=None):
+        if rollout == 'static':
+            return self.evaluate_position(self.board)
+
         current_board = self.board.copy()
         
         # Simulasi random sampai game selesai atau maksimal 50 move
         simulation_depth = 0
         while not current_board.is_game_over() and simulation_depth < 50:
+            # Setiap ply rollout dihitung sebagai node, supaya stop tidak menunggu rollout selesai
+            if control is not None:
+                control.tick()
             legal_moves = list(current_board.legal_moves)
             if not legal_moves:
                 break
             
             # Random move dengan sedikit bias ke move yang baik
-            if random.random() < 0.3 and len(legal_moves) > 1:
+            if rng.random() < 0.3 and len(legal_moves) > 1:
                 # 30% peluang move terbaik dari 3 random move
-                sample_moves = random.sample(legal_moves, min(3, len(legal_moves)))
+                sample_moves = rng.sample(legal_moves, min(3, len(legal_moves)))
                 best_move = sample_moves[0]
                 best_eval = float('-inf')
                 
@@ -65,7 +150,7 @@ class MCTSNode:
                 current_board.push(best_move)
             else:
                 # 70% peluang random move
-                current_board.push(random.choice(legal_moves))
+                current_board.push(rng.choice(legal_moves))
             
             simulation_depth += 1
         
@@ -83,17 +168,78 @@ class MCTSNode:
     def backpropagate(self, result):
         self.visits += 1
         self.wins += result
+        self.update_proven()
         if self.parent:
             self.parent.backpropagate(-result)
 
-def monte_carlo_tree_search(fen, max_iterations=5000, time_limit=7.0):
+    # Sisi yang melangkah di node ini menang jika ada satu child proven win (node = kalah bagi yang melangkah
+    # ke sini); draw/kalah hanya bisa dibuktikan jika semua move sudah di-expand dan semua child terbukti
+    def update_proven(self):
+        if self.proven is not None or not self.children:
+            return
+
+        winning = [child.proven_plies for child in self.children if child.proven == PROVEN_WIN]
+        if winning:
+            self.proven = PROVEN_LOSS
+            self.proven_plies = min(winning) + 1
+            return
+
+        if self.untried_moves or any(child.proven is None for child in self.children):
+            return
+
+        if any(child.proven == PROVEN_DRAW for child in self.children):
+            self.proven = PROVEN_DRAW
+            self.proven_plies = min(child.proven_plies for child in self.children if child.proven == PROVEN_DRAW) + 1
+        else:
+            # Semua move kalah: lawan menang, dengan perlawanan terpanjang
+            self.proven = PROVEN_WIN
+            self.proven_plies = max(child.proven_plies for child in self.children) + 1
+
+    # Move terbaik: menang tercepat jika terbukti, selain itu visit terbanyak di antara move yang belum terbukti kalah
+    def best_child(self):
+        winning = [child for child in self.children if child.proven == PROVEN_WIN]
+        if winning:
+            return min(winning, key=lambda child: child.proven_plies)
+
+        candidates = [child for child in self.children if child.proven != PROVEN_LOSS]
+        if not candidates:
+            return max(self.children, key=lambda child: child.proven_plies)
+        return max(candidates, key=lambda child: child.visits)
+
+# Cari node di tree sesi sebelumnya (maksimal 2 ply: move AI + balasan lawan) yang posisinya sama
+def reuse_root(previous_root, board):
+    if previous_root is None:
+        return None
+
+    target = board.epd()
+    frontier = [previous_root]
+    for _ in range(3):
+        next_frontier = []
+        for node in frontier:
+            if node.board.epd() == target:
+                node.parent = None
+                node.move = None
+                return node
+            next_frontier.extend(node.children)
+        frontier = next_frontier
+
+    return None
+
+# time_limit=None: mode fixed-iteration (tepat max_iterations, tanpa cutoff waktu); seed membuat rollout deterministik.
+# control: SearchControl bersama (menggantikan time_limit), misalnya dengan cancel event dari pool.
+def monte_carlo_tree_search(fen, max_iterations=5000, time_limit=7.0, state=None, on_info=None, rollout=DEFAULT_ROLLOUT,
+                            seed=None, control=None):
     try:
-        board = chess.Board(fen)
+        if rollout not in ROLLOUTS:
+            raise ValueError(f"Invalid rollout: {rollout}")
+
+        board = load_board(fen)
+        control = control or SearchControl(time_limit=time_limit)
 
         start_time = time.time()
 
         # Cek mate
-        mate_result = mate_search(board)
+        mate_result = mate_search(board, control=control)
 
         # Jika game over (checkmate, stalemate, and insufficient material)
         if board.is_game_over():
@@ -120,32 +266,64 @@ def monte_carlo_tree_search(fen, max_iterations=5000, time_limit=7.0):
             
             return result
         
-        root = MCTSNode(board)
+        # Pakai ulang subtree dari search sebelumnya dalam sesi yang sama
+        root = reuse_root(state.mcts_root, board) if state is not None else None
+        if root is None:
+            root = MCTSNode(board)
+        reused_visits = root.visits
+        rng = random.Random(seed)
         
         iteration = 0
-        while iteration < max_iterations and (time.time() - start_time) < time_limit:
+        next_info = start_time + INFO_INTERVAL
+        # Root terbukti (juga root hasil reuse): hasil tidak akan berubah lagi, move langsung dipilih
+        while root.proven is None and iteration < max_iterations and not control.should_stop():
             # Selection
             node = root
-            while not node.is_terminal() and node.is_fully_expanded():
-                node = node.select_child()
+            while not node.is_terminal() and not node.can_expand():
+                child = node.select_child()
+                if child is None:
+                    break
+                node = child
             
-            # Expansion
-            if not node.is_terminal() and not node.is_fully_expanded():
+            # Expansion (node yang semua child-nya terbukti bisa sudah fully expanded)
+            if not node.is_terminal() and node.can_expand():
                 node = node.expand()
             
-            # Simulation
-            result = node.simulate()
+            # Simulation (iterasi yang terpotong stop tidak di-backpropagate)
+            try:
+                control.tick()
+                result = node.simulate(rollout, rng, control)
+            except SearchStopped:
+                break
             
-            # Backpropagation
-            node.backpropagate(result)
+            # Backpropagation (hasil simulasi dari sisi white, dibalik jika node dicapai lewat move black)
+            node.backpropagate(result if node.board.turn == chess.BLACK else -result)
             
             iteration += 1
+
+            # Kirim move terbaik sementara secara berkala (untuk streaming ke client)
+            if on_info is not None and root.children and time.time() >= next_info:
+                next_info = time.time() + INFO_INTERVAL
+                leader = root.best_child()
+                on_info({
+                    'best_move': leader.move.uci(),
+                    'evaluation': leader.wins / leader.visits * 100 if leader.visits else 0,
+                    'iterations': iteration,
+                    'time': time.time() - start_time,
+                })
+
+        if state is not None:
+            state.mcts_root = root
         
+        # Search dipotong sebelum ada child: expand satu move (prior tertinggi) supaya tetap ada move
+        if not root.children and not root.is_fully_expanded():
+            root.expand()
+
         # Pilih move terbaik berdasarkan visit count
         if not root.children:
             return {'mate': False, 'best_move': None, 'evaluation': 0}
         
-        best_child = max(root.children, key=lambda child: child.visits)
+        best_child = root.best_child()
         
         # Hitung evaluation dari best child
         evaluation = best_child.wins / best_child.visits if best_child.visits > 0 else 0
@@ -154,13 +332,27 @@ def monte_carlo_tree_search(fen, max_iterations=5000, time_limit=7.0):
         end_time = time.time()
         time_taken = end_time - start_time
         
-        return {
+        result = {
             'mate': False,
             'best_move': best_child.move.uci() if best_child.move else None,
             'evaluation': evaluation,
             'iterations': iteration,
-            'time': time_taken
+            'iterations_per_second': iteration / time_taken if time_taken > 0 else None,
+            'reused_visits': reused_visits,
+            'time': time_taken,
+            'mate_in': mate_result.get('mate_in'),
+            'proven': None,
+            'stopped': control.reason,
         }
+
+        # Hasil exact dari sisi yang melangkah di root (kebalikan dari nilai root) beserta jarak ke akhir game
+        if root.proven is not None:
+            result['proven'] = PROVEN_NAMES[-root.proven]
+            result['mate_distance'] = root.proven_plies
+            if root.proven == PROVEN_LOSS:
+                result['mate_in'] = root.proven_plies
+                result['evaluation'] = 100.0
+        return result
     
     except Exception as e:
         return {'error': str(e), 'mate': False, 'best_move': None}
\ No newline at end of file
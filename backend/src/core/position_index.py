@@ -0,0 +1,183 @@
+import chess
+import random
+import threading
+from array import array
+
+# Index semua posisi awal KPK yang valid (black to move, tidak sedang check).
+# Posisi disimpan sebagai integer: wk | (wp << 6) | (bk << 12)
+INVALID = 0
+VALID = 1
+VALID_STALEMATE = 2
+
+# Tabel legalitas semua posisi KPK: key = wk | (wp << 6) | (bk << 12) | (side to move << 18)
+SIDE_TO_MOVE_SHIFT = 18
+
+_index_lock = threading.Lock()
+_start_positions = None
+_position_flags = None
+_legal_positions = None
+
+def pack_squares(wk, wp, bk):
+    return wk | (wp << 6) | (bk << 12)
+
+def unpack_squares(key):
+    return key & 63, (key >> 6) & 63, (key >> 12) & 63
+
+def king_distance(a, b):
+    return max(abs((a & 7) - (b & 7)), abs((a >> 3) - (b >> 3)))
+
+def pawn_attacks(wp):
+    attacks = []
+    file = wp & 7
+    if wp < 56:
+        if file > 0:
+            attacks.append(wp + 7)
+        if file < 7:
+            attacks.append(wp + 9)
+    return attacks
+
+def king_neighbours(square):
+    file = square & 7
+    rank = square >> 3
+    neighbours = []
+    for df in (-1, 0, 1):
+        for dr in (-1, 0, 1):
+            if df == 0 and dr == 0:
+                continue
+            f = file + df
+            r = rank + dr
+            if 0 <= f < 8 and 0 <= r < 8:
+                neighbours.append(r * 8 + f)
+    return neighbours
+
+# Tabel lookup supaya build index / bitbase tidak menghitung ulang geometri papan
+KING_DISTANCE = [[king_distance(a, b) for b in range(64)] for a in range(64)]
+KING_NEIGHBOURS = [king_neighbours(square) for square in range(64)]
+PAWN_ATTACKS = [pawn_attacks(square) for square in range(64)]
+
+def _black_is_stalemated(wk, wp, bk, attacked_by_pawn):
+    for square in KING_NEIGHBOURS[bk]:
+        if KING_DISTANCE[square][wk] <= 1 or square in attacked_by_pawn:
+            continue
+        # Pawn yang tidak dijaga king boleh di-capture
+        return False
+    return True
+
+# Posisi legal: square berbeda, pawn di rank 2-7, king tidak bersebelahan,
+# dan sisi yang tidak sedang jalan tidak dalam kondisi check
+def _build_legality_table():
+    legal = bytearray(1 << (SIDE_TO_MOVE_SHIFT + 1))
+    white_to_move = 1 << SIDE_TO_MOVE_SHIFT
+
+    for wp in range(8, 56):
+        attacked_by_pawn = PAWN_ATTACKS[wp]
+        for wk in range(64):
+            if wk == wp:
+                continue
+            distance_from_wk = KING_DISTANCE[wk]
+            for bk in range(64):
+                if bk == wp or bk == wk or distance_from_wk[bk] < 2:
+                    continue
+
+                key = pack_squares(wk, wp, bk)
+                # White king hanya bisa di-check oleh black king (tidak mungkin karena jarak >= 2)
+                legal[key] = 1
+                # White to move: black king tidak boleh sedang diserang pawn
+                if bk not in attacked_by_pawn:
+                    legal[key | white_to_move] = 1
+
+    return legal
+
+def _build_index(legal):
+    positions = array('I')
+    flags = bytearray(1 << 18)
+    white_to_move = 1 << SIDE_TO_MOVE_SHIFT
+
+    for wp in range(8, 56):
+        attacked_by_pawn = PAWN_ATTACKS[wp]
+        for wk in range(64):
+            if wk == wp:
+                continue
+            for bk in range(64):
+                key = pack_squares(wk, wp, bk)
+                # Posisi awal: legal dengan black to move dan black tidak dalam kondisi check
+                # (sama dengan syarat legal untuk white to move)
+                if not legal[key | white_to_move]:
+                    continue
+
+                positions.append(key)
+                if _black_is_stalemated(wk, wp, bk, attacked_by_pawn):
+                    flags[key] = VALID_STALEMATE
+                else:
+                    flags[key] = VALID
+
+    return positions, flags
+
+def get_legality_table():
+    global _legal_positions
+
+    if _legal_positions is None:
+        with _index_lock:
+            if _legal_positions is None:
+                _legal_positions = _build_legality_table()
+
+    return _legal_positions
+
+def get_position_index():
+    global _start_positions, _position_flags
+
+    if _start_positions is None:
+        legal = get_legality_table()
+        with _index_lock:
+            if _start_positions is None:
+                positions, flags = _build_index(legal)
+                _position_flags = flags
+                _start_positions = positions
+
+    return _start_positions, _position_flags
+
+def is_legal_squares(wk, wp, bk, turn):
+    return get_legality_table()[pack_squares(wk, wp, bk) | (turn << SIDE_TO_MOVE_SHIFT)] == 1
+
+def start_position_flag(wk, wp, bk):
+    _, flags = get_position_index()
+    return flags[pack_squares(wk, wp, bk)]
+
+def random_start_squares(rng=random):
+    positions, _ = get_position_index()
+    return unpack_squares(positions[rng.randrange(len(positions))])
+
+def board_from_squares(wk, wp, bk, turn=chess.BLACK):
+    board = chess.Board(None)
+
+    board.set_piece_at(wk, chess.Piece(chess.KING, chess.WHITE))
+    board.set_piece_at(wp, chess.Piece(chess.PAWN, chess.WHITE))
+    board.set_piece_at(bk, chess.Piece(chess.KING, chess.BLACK))
+
+    board.turn = turn
+    board.fullmove_number = 1
+    board.halfmove_clock = 0
+
+    return board
+
+# Ambil (wk, wp, bk) jika board hanya berisi King + Pawn vs King
+def kpk_squares(board):
+    if board.occupied != (board.kings | board.pawns):
+        return None
+
+    white_pawns = board.pawns & board.occupied_co[chess.WHITE]
+    if chess.popcount(board.occupied) != 3 or chess.popcount(white_pawns) != 1:
+        return None
+
+    wk = board.king(chess.WHITE)
+    bk = board.king(chess.BLACK)
+    if wk is None or bk is None:
+        return None
+
+    return wk, chess.lsb(white_pawns), bk
+
+# Ambil (wk, wp, bk) jika board berupa posisi awal KPK dengan black to move
+def start_position_squares(board):
+    if board.turn != chess.BLACK or board.ep_square is not None:
+        return None
+    return kpk_squares(board)
@@ -0,0 +1,77 @@
+import time
+
+# Kontrol search bersama untuk semua engine dan mate_search: deadline, batas node, dan cancel
+# (event dari pool proses, stop dari API, atau client disconnect). Batas node dicek exact setiap node,
+# jam dan flag cancel hanya setiap CHECK_INTERVAL node supaya overhead per node tetap kecil.
+CHECK_INTERVAL = 64
+
+class SearchStopped(Exception):
+    pass
+
+class SearchControl:
+    # cancel_event: objek dengan is_set() (threading/multiprocessing Event), is_cancelled: callable tambahan
+    def __init__(self, time_limit=None, max_nodes=None, cancel_event=None, is_cancelled=None,
+                 check_interval=CHECK_INTERVAL):
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + time_limit if time_limit is not None else None
+        self.max_nodes = max_nodes
+        self.cancel_event = cancel_event
+        self.is_cancelled = is_cancelled
+        self.check_interval = check_interval
+        self.nodes = 0
+        self.stopped = False
+        self.reason = None
+
+        # Move terbaik sementara di root (dari depth yang sedang berjalan), dipakai jika search dipotong
+        self.best_move = None
+        self.best_score = None
+        self._next_check = self._check_point()
+
+    def _check_point(self):
+        point = self.nodes + self.check_interval
+        if self.max_nodes is not None:
+            point = min(point, self.max_nodes)
+        return point
+
+    # Dipanggil sekali per node; raise SearchStopped jika search harus berhenti
+    def tick(self):
+        self.nodes += 1
+        if self.nodes >= self._next_check:
+            self._next_check = self._check_point()
+            if self.should_stop():
+                raise SearchStopped(self.reason)
+
+    def should_stop(self):
+        if self.stopped:
+            return True
+
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            reason = 'nodes'
+        elif self.deadline is not None and time.monotonic() >= self.deadline:
+            reason = 'time'
+        elif (self.cancel_event is not None and self.cancel_event.is_set()) or \
+                (self.is_cancelled is not None and self.is_cancelled()):
+            reason = 'cancelled'
+        else:
+            return False
+
+        self.stop(reason)
+        return True
+
+    def stop(self, reason='cancelled'):
+        self.stopped = True
+        self.reason = reason
+        # Tick berikutnya langsung raise
+        self._next_check = 0
+
+    def update_best(self, move, score):
+        self.best_move = move
+        self.best_score = score
+
+    def elapsed(self):
+        return time.monotonic() - self.started_at
+
+# SearchStopped memotong rekursi sebelum board.pop(): kembalikan board ke jumlah ply semula
+def unwind(board, ply):
+    while len(board.move_stack) > ply:
+        board.pop()
@@ -0,0 +1,65 @@
+from .symmetry import canonical_key
+
+# State engine yang bisa dipakai ulang antar search dalam satu sesi game
+EXACT = 0
+LOWERBOUND = 1
+UPPERBOUND = 2
+
+TT_ENTRY_BYTES = 160
+MCTS_NODE_BYTES = 1200
+
+# Key TT dalam orientasi kanonik (mirror file), move di TT disimpan dalam orientasi yang sama
+def position_key(board):
+    return canonical_key(board)
+
+class TranspositionTable:
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    # Return (value, move) jika entry cukup dalam dan bound-nya memotong window, selain itu (None, move)
+    def lookup(self, key, depth, alpha, beta):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None, None
+
+        entry_depth, value, flag, move = entry
+        if entry_depth >= depth:
+            if flag == EXACT:
+                return value, move
+            if flag == LOWERBOUND and value >= beta:
+                return value, move
+            if flag == UPPERBOUND and value <= alpha:
+                return value, move
+
+        return None, move
+
+    def store(self, key, depth, value, alpha, beta, move):
+        if value <= alpha:
+            flag = UPPERBOUND
+        elif value >= beta:
+            flag = LOWERBOUND
+        else:
+            flag = EXACT
+
+        existing = self.entries.get(key)
+        if existing is not None and existing[0] > depth:
+            return
+
+        if existing is None and len(self.entries) >= self.max_entries:
+            # Buang entry paling lama (dict mempertahankan urutan insert)
+            del self.entries[next(iter(self.entries))]
+
+        self.entries[key] = (depth, value, flag, move)
+
+class SearchState:
+    def __init__(self, tt_entries=100000):
+        self.tt = TranspositionTable(tt_entries)
+        self.mcts_root = None
+
+    def approximate_bytes(self):
+        mcts_nodes = self.mcts_root.visits if self.mcts_root is not None else 0
+        return len(self.tt) * TT_ENTRY_BYTES + mcts_nodes * MCTS_NODE_BYTES
@@ -0,0 +1,70 @@
+import chess
+
+# Posisi tanpa hak castling simetris terhadap mirror file (a <-> h): hasil untuk satu orientasi
+# berlaku untuk orientasi lainnya setelah square di-mirror balik. Cache, bitbase, dan transposition
+# table menyimpan posisi dalam orientasi kanonik supaya kedua orientasi berbagi satu entry.
+
+# Mirror file per byte (satu byte = satu rank) lewat tabel reverse bit, lebih cepat dari chess.flip_horizontal
+_REVERSED_BITS = bytes(int(f"{value:08b}"[::-1], 2) for value in range(256))
+
+def flip_files(mask):
+    return int.from_bytes(mask.to_bytes(8, 'little').translate(_REVERSED_BITS), 'little')
+
+def mirror_square(square):
+    return square ^ 7
+
+def mirror_move(move):
+    return chess.Move(move.from_square ^ 7, move.to_square ^ 7, move.promotion)
+
+def orient_move(move, mirrored):
+    if mirrored and move is not None:
+        return mirror_move(move)
+    return move
+
+def mirror_square_name(name):
+    return chr(201 - ord(name[0])) + name[1]
+
+def mirror_uci(uci):
+    return mirror_square_name(uci[0:2]) + mirror_square_name(uci[2:4]) + uci[4:]
+
+# Key posisi kanonik (bitboard + side to move + en passant + castling) dan apakah board di-mirror.
+# Orientasi kanonik = tuple bitboard terkecil di antara board asli dan mirror-nya.
+def canonical_key(board):
+    pieces = (
+        board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings,
+        board.occupied_co[chess.WHITE],
+    )
+    ep_square = board.ep_square
+    if ep_square is not None and not board.has_legal_en_passant():
+        ep_square = None
+
+    mirrored = False
+    if not board.castling_rights:
+        # Bandingkan bitboard pertama yang tidak simetris saja, mirror penuh hanya jika perlu
+        for mask in pieces:
+            flipped = flip_files(mask)
+            if flipped != mask:
+                mirrored = flipped < mask
+                break
+
+    if mirrored:
+        pieces = tuple(flip_files(mask) if mask else 0 for mask in pieces)
+        if ep_square is not None:
+            ep_square ^= 7
+
+    return pieces + (board.turn, ep_square, board.castling_rights), mirrored
+
+# Versi string untuk cache yang di-key FEN (tanpa parse board): setiap rank cukup dibalik per karakter
+def canonical_fen(fen):
+    fields = fen.split()
+    if len(fields) < 4 or fields[2] != '-':
+        return fen, False
+
+    placement = '/'.join(row[::-1] for row in fields[0].split('/'))
+    if placement >= fields[0]:
+        return fen, False
+
+    fields[0] = placement
+    if fields[3] != '-':
+        fields[3] = mirror_square_name(fields[3])
+    return ' '.join(fields), True
@@ -4,11 +4,15 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from api.endpoints import app
+from api.warmup import start_warmup
 
 if __name__ == "__main__":
     print("Starting Flask server...")
     print("Available routes:")
     for rule in app.url_map.iter_rules():
         print(f"  {rule.endpoint}: {rule.rule}")
-    
+
+    # Reloader menjalankan app di proses anak; warmup hanya di proses yang melayani request
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_warmup()
     app.run(debug=True, host="0.0.0.0", port=5000)
\ No newline at end of file
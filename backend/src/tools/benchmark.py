@@ -0,0 +1,317 @@
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chess
+
+from core.chess_rules import mate_search, randomize_board
+from core.mabp import minimax_alpha_beta_pruning
+from core.iterative_deepening import iterative_deepening_search
+from core.mcts import ROLLOUTS, monte_carlo_tree_search
+from util.board_parser import board_to_positions, parse_board
+from util.serialization import compact_payload, dumps, orjson
+
+TEST_CASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'test'))
+
+# Posisi tetap (white to move) supaya hasil benchmark bisa dibandingkan antar run
+FIXED_POSITIONS = [
+    ("opposition_center", "8/8/8/3k4/8/3K4/3P4/8 w - - 0 1"),
+    ("rook_pawn", "8/8/8/8/k7/8/P7/2K5 w - - 0 1"),
+    ("key_square", "8/8/3k4/8/3K4/3P4/8/8 w - - 0 1"),
+    ("pawn_race", "8/1k6/8/8/8/8/6P1/4K3 w - - 0 1"),
+    ("promotion_near", "8/4P3/8/3K4/8/8/8/6k1 w - - 0 1"),
+    ("seventh_rank", "3k4/8/3PK3/8/8/8/8/8 w - - 0 1"),
+]
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+def latency_summary(samples):
+    return {
+        "count": len(samples),
+        "mean": sum(samples) / len(samples) if samples else None,
+        "p50": percentile(samples, 50),
+        "p99": percentile(samples, 99),
+        "max": max(samples) if samples else None,
+    }
+
+# Posisi dari file test (black to move) dijadikan white to move dengan langkah black pertama
+def white_to_move(board):
+    if board.turn == chess.WHITE:
+        return board
+    moves = sorted(board.legal_moves, key=lambda move: move.uci())
+    if not moves:
+        return None
+    board = board.copy()
+    board.push(moves[0])
+    return board
+
+def load_corpus(seed=2024, sample_size=6):
+    corpus = []
+
+    for name in sorted(os.listdir(TEST_CASE_DIR)) if os.path.isdir(TEST_CASE_DIR) else []:
+        if not name.endswith('.txt'):
+            continue
+        with open(os.path.join(TEST_CASE_DIR, name), 'rb') as file:
+            board = white_to_move(parse_board(file))
+        if board is not None:
+            corpus.append({"name": name, "fen": board.fen()})
+
+    for name, fen in FIXED_POSITIONS:
+        corpus.append({"name": name, "fen": fen})
+
+    rng = random.Random(seed)
+    while sample_size > 0:
+        board = white_to_move(randomize_board(rng))
+        if board is None or board.is_game_over():
+            continue
+        corpus.append({"name": f"sample_{sample_size}", "fen": board.fen()})
+        sample_size -= 1
+
+    return corpus
+
+def bench_mate_search(corpus, repeat):
+    samples = []
+    for entry in corpus:
+        board = chess.Board(entry["fen"])
+        for _ in range(repeat):
+            start = time.perf_counter()
+            mate_search(board)
+            samples.append(time.perf_counter() - start)
+    return {"latency": latency_summary(samples)}
+
+def bench_mabp(corpus, max_depth):
+    per_depth = {}
+    for depth in range(1, max_depth + 1):
+        samples = []
+        nodes = 0
+        for entry in corpus:
+            start = time.perf_counter()
+            result = minimax_alpha_beta_pruning(entry["fen"], depth=depth)
+            samples.append(time.perf_counter() - start)
+            nodes += result.get("nodes_explored", 0)
+        elapsed = sum(samples)
+        per_depth[str(depth)] = {
+            "nodes": nodes,
+            "nodes_per_second": nodes / elapsed if elapsed > 0 else None,
+            "latency": latency_summary(samples),
+        }
+    return {"per_depth": per_depth}
+
+def bench_iterative_deepening(corpus, max_depth, time_limit):
+    samples = []
+    nodes = 0
+    time_to_depth = {}
+    for entry in corpus:
+        start = time.perf_counter()
+        result = iterative_deepening_search(entry["fen"], max_depth=max_depth, time_limit=time_limit)
+        samples.append(time.perf_counter() - start)
+        nodes += result.get("nodes_searched", result.get("nodes_explored", 0))
+        for depth, reached_at in enumerate(result.get("depth_times", []), start=1):
+            time_to_depth.setdefault(str(depth), []).append(reached_at)
+    elapsed = sum(samples)
+    return {
+        "nodes": nodes,
+        "nodes_per_second": nodes / elapsed if elapsed > 0 else None,
+        "time_to_depth": {depth: latency_summary(values) for depth, values in time_to_depth.items()},
+        "latency": latency_summary(samples),
+    }
+
+def bench_mcts(corpus, iterations, time_limit, rollout, seed):
+    samples = []
+    total_iterations = 0
+    for entry in corpus:
+        start = time.perf_counter()
+        result = monte_carlo_tree_search(entry["fen"], max_iterations=iterations, time_limit=time_limit, rollout=rollout,
+                                         seed=seed)
+        samples.append(time.perf_counter() - start)
+        total_iterations += result.get("iterations", 0)
+    elapsed = sum(samples)
+    return {
+        "iterations": total_iterations,
+        "iterations_per_second": total_iterations / elapsed if elapsed > 0 else None,
+        "latency": latency_summary(samples),
+    }
+
+def bench_endpoints(corpus, repeat, algorithms):
+    from api.endpoints import app
+
+    # Solve berulang harus benar-benar menjalankan search, bukan dijawab dari store analisis persisten
+    os.environ["KPK_ANALYSIS_DB"] = ""
+
+    client = app.test_client()
+    requests = {
+        "health": lambda entry: client.get('/api/health'),
+        "randomize": lambda entry: client.post('/api/randomize'),
+        "parse-fen": lambda entry: client.post('/api/parse-fen', json={"fen": entry["fen"]}),
+        "legal-moves": lambda entry: client.post('/api/legal-moves', json={"fen": entry["fen"]}),
+    }
+    for algorithm in algorithms:
+        requests[f"solve:{algorithm}"] = lambda entry, algorithm=algorithm: client.post(
+            '/api/solve', json={"fen": entry["fen"], "algorithm": algorithm}
+        )
+
+    with open(os.path.join(TEST_CASE_DIR, 'tc1.txt'), 'rb') as file:
+        upload_content = file.read()
+    requests["upload"] = lambda entry: client.post(
+        '/api/upload', data={"file": (io.BytesIO(upload_content), 'tc1.txt')}, content_type='multipart/form-data'
+    )
+
+    results = {}
+    for name, send in requests.items():
+        samples = []
+        payload_bytes = 0
+        errors = 0
+        runs = 1 if name.startswith("solve:") else repeat
+        for entry in corpus:
+            for _ in range(runs):
+                start = time.perf_counter()
+                response = send(entry)
+                samples.append(time.perf_counter() - start)
+                payload_bytes += len(response.get_data())
+                if response.status_code >= 500:
+                    errors += 1
+        results[name] = {
+            "latency": latency_summary(samples),
+            "mean_payload_bytes": payload_bytes / len(samples) if samples else None,
+            "errors": errors,
+        }
+    return results
+
+# Bandingkan serializer JSON default Flask dengan serializer cepat dan format compact pada payload endpoint
+def bench_serialization(corpus, repeat):
+    from api.endpoints import app
+
+    client = app.test_client()
+    payloads = {
+        "randomize": [client.post('/api/randomize').get_json() for _ in corpus],
+        "parse-fen": [client.post('/api/parse-fen', json={"fen": entry["fen"]}).get_json() for entry in corpus],
+        "legal-moves": [client.post('/api/legal-moves', json={"fen": entry["fen"]}).get_json() for entry in corpus],
+        "solve:mabp": [
+            client.post('/api/solve', json={"fen": entry["fen"], "algorithm": "mabp"}).get_json() for entry in corpus
+        ],
+    }
+    serializers = {
+        "flask_default": lambda payload: json.dumps(payload, sort_keys=True, separators=(",", ":")).encode(),
+        "fast": dumps,
+        "compact": lambda payload: dumps(compact_payload(payload)),
+    }
+    loops = max(1, repeat) * 200
+
+    results = {"orjson": orjson is not None}
+    for name, samples in payloads.items():
+        results[name] = {}
+        for serializer_name, serialize in serializers.items():
+            start = time.perf_counter()
+            for _ in range(loops):
+                for payload in samples:
+                    serialize(payload)
+            elapsed = time.perf_counter() - start
+            results[name][serializer_name] = {
+                "us_per_payload": elapsed / (loops * len(samples)) * 1e6,
+                "mean_bytes": sum(len(serialize(payload)) for payload in samples) / len(samples),
+            }
+
+    boards = [chess.Board(entry["fen"]) for entry in corpus]
+    start = time.perf_counter()
+    for _ in range(loops):
+        for board in boards:
+            board_to_positions(board)
+    results["board_to_positions_us"] = (time.perf_counter() - start) / (loops * len(boards)) * 1e6
+
+    return results
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(__file__), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+def run_benchmarks(args):
+    corpus = load_corpus(args.seed, args.samples)
+    suites = set(args.suites)
+    results = {}
+
+    if "mate_search" in suites:
+        results["mate_search"] = bench_mate_search(corpus, args.repeat)
+    if "mabp" in suites:
+        results["mabp"] = bench_mabp(corpus, args.depth)
+    # Mode fixed-work: tanpa cutoff waktu, sehingga jumlah node/iterasi sama di setiap run dan mesin
+    time_limit = None if args.fixed_work else args.time_limit
+    if "iterative_deepening" in suites:
+        results["iterative_deepening"] = bench_iterative_deepening(corpus, args.depth, time_limit)
+    if "mcts" in suites:
+        results["mcts"] = bench_mcts(corpus, args.mcts_iterations, time_limit, args.mcts_rollout, args.seed)
+    if "endpoints" in suites:
+        results["endpoints"] = bench_endpoints(corpus, args.repeat, args.solve_algorithms)
+    if "serialization" in suites:
+        results["serialization"] = bench_serialization(corpus, args.repeat)
+
+    return {
+        "meta": {
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "corpus": corpus,
+            "settings": {
+                "depth": args.depth,
+                "time_limit": args.time_limit,
+                "fixed_work": args.fixed_work,
+                "mcts_iterations": args.mcts_iterations,
+                "mcts_rollout": args.mcts_rollout,
+                "repeat": args.repeat,
+                "seed": args.seed,
+            },
+        },
+        "results": results,
+    }
+
+def print_summary(report):
+    for suite, result in report["results"].items():
+        print(f"[{suite}]")
+        print(json.dumps(result, indent=2, default=str))
+
+SUITES = ["mate_search", "mabp", "iterative_deepening", "mcts", "endpoints", "serialization"]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark engine dan endpoint KPK solver")
+    parser.add_argument('--suites', nargs='+', choices=SUITES, default=SUITES)
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--time-limit', type=float, default=7.0)
+    parser.add_argument('--fixed-work', action='store_true',
+                        help="Abaikan time limit: engine berhenti di depth/iterasi tetap (hasil reproducible)")
+    parser.add_argument('--mcts-iterations', type=int, default=300)
+    parser.add_argument('--mcts-rollout', choices=ROLLOUTS, default='random')
+    parser.add_argument('--solve-algorithms', nargs='*', default=['mabp', 'iterative_deepening'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--samples', type=int, default=6)
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--output', help="Simpan hasil sebagai JSON untuk perbandingan tren")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args)
+    print_summary(report)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"Hasil disimpan ke {args.output}")
+
+if __name__ == "__main__":
+    main()
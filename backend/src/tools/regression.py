@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chess
+
+from core.chess_rules import mate_search
+from core.kpk_bitbase import DRAW, RESULT_NAMES, WIN, get_bitbase, position_key, probe, probe_move
+from core.mabp import minimax_alpha_beta_pruning
+from core.iterative_deepening import iterative_deepening_search
+from core.mcts import ROLLOUTS, monte_carlo_tree_search
+from core.position_index import board_from_squares
+from tools.benchmark import git_revision, latency_summary
+
+ENGINES = ["mabp", "iterative_deepening", "mcts"]
+
+# Ambil sampel posisi white to move yang menang menurut solver exhaustive
+def sample_positions(count, seed, include_draws=False):
+    results, _ = get_bitbase()
+    rng = random.Random(seed)
+    positions = []
+    seen = set()
+
+    while len(positions) < count:
+        wk, wp, bk = rng.randrange(64), rng.randrange(8, 56), rng.randrange(64)
+        key = position_key(wk, wp, bk, True)
+        if key in seen:
+            continue
+        seen.add(key)
+
+        result = results[key]
+        if result == WIN or (include_draws and result == DRAW):
+            board = board_from_squares(wk, wp, bk, chess.WHITE)
+            if not board.is_game_over():
+                positions.append(board)
+
+    return positions
+
+def run_engine(name, fen, args):
+    time_limit = None if args.fixed_work else args.time_limit
+    if name == "mabp":
+        return minimax_alpha_beta_pruning(fen, depth=args.depth)
+    if name == "iterative_deepening":
+        return iterative_deepening_search(fen, max_depth=args.depth, time_limit=time_limit)
+    return monte_carlo_tree_search(fen, max_iterations=args.mcts_iterations, time_limit=time_limit,
+                                   rollout=args.mcts_rollout, seed=args.seed)
+
+# Bandingkan best move engine dengan hasil exact: move harus mempertahankan kemenangan
+def check_engine(name, positions, args):
+    samples = []
+    work = 0
+    checked = correct = optimal = errors = 0
+    failures = []
+
+    for board in positions:
+        fen = board.fen()
+        start = time.perf_counter()
+        result = run_engine(name, fen, args)
+        samples.append(time.perf_counter() - start)
+        work += result.get("nodes_explored", result.get("iterations", 0))
+
+        expected, _ = probe(board)
+        if expected != WIN:
+            continue
+
+        checked += 1
+        best_move = result.get("best_move")
+        if not best_move:
+            errors += 1
+            failures.append({"fen": fen, "move": None, "error": result.get("error")})
+            continue
+
+        move = chess.Move.from_uci(best_move)
+        outcome = probe_move(board, move) if move in board.legal_moves else None
+        if outcome is None or outcome[0] != WIN:
+            failures.append({"fen": fen, "move": best_move})
+            continue
+
+        correct += 1
+        candidates = [probe_move(board, candidate) for candidate in board.legal_moves]
+        fastest = min(plies for result, plies in candidates if result == WIN)
+        if outcome[1] <= fastest:
+            optimal += 1
+
+    elapsed = sum(samples)
+    return {
+        "positions": len(positions),
+        "won_positions": checked,
+        "accuracy": correct / checked if checked else None,
+        "optimal_rate": optimal / checked if checked else None,
+        "errors": errors,
+        "work_per_second": work / elapsed if elapsed > 0 else None,
+        "latency": latency_summary(samples),
+        "failures": failures[:args.max_failures],
+    }
+
+# mate_search tidak boleh mengklaim mate pada posisi yang draw menurut solver
+def check_mate_search(positions):
+    samples = []
+    claims = false_claims = 0
+    failures = []
+
+    for board in positions:
+        start = time.perf_counter()
+        mate_info = mate_search(board)
+        samples.append(time.perf_counter() - start)
+
+        if mate_info.get("mate_in") is None:
+            continue
+        claims += 1
+        expected, _ = probe(board)
+        if expected != WIN:
+            false_claims += 1
+            failures.append({"fen": board.fen(), "mate_info": mate_info, "expected": RESULT_NAMES[expected]})
+
+    return {
+        "positions": len(positions),
+        "mate_claims": claims,
+        "false_claims": false_claims,
+        "latency": latency_summary(samples),
+        "failures": failures,
+    }
+
+def compare_with_baseline(report, baseline, tolerance):
+    regressions = []
+    for name, result in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or result.get("accuracy") is None or previous.get("accuracy") is None:
+            continue
+        if result["accuracy"] < previous["accuracy"] - tolerance:
+            regressions.append(f"{name}: accuracy {previous['accuracy']:.3f} -> {result['accuracy']:.3f}")
+
+    mate = report["results"].get("mate_search")
+    if mate and mate["false_claims"] > 0:
+        regressions.append(f"mate_search: {mate['false_claims']} false mate claims")
+
+    return regressions
+
+# Nilai None (tidak ada posisi menang di sampel, tidak ada sample latency) dicetak sebagai n/a
+def format_value(value, spec):
+    return "n/a" if value is None else format(value, spec)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regression harness engine terhadap solver KPK exhaustive")
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=ENGINES)
+    parser.add_argument('--positions', type=int, default=100)
+    parser.add_argument('--include-draws', action='store_true')
+    parser.add_argument('--depth', type=int, default=5)
+    parser.add_argument('--time-limit', type=float, default=7.0)
+    parser.add_argument('--fixed-work', action='store_true',
+                        help="Abaikan time limit: engine berhenti di depth/iterasi tetap (hasil reproducible)")
+    parser.add_argument('--mcts-iterations', type=int, default=300)
+    parser.add_argument('--mcts-rollout', choices=ROLLOUTS, default='random')
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--max-failures', type=int, default=10)
+    parser.add_argument('--baseline', help="File JSON hasil run sebelumnya untuk deteksi regresi")
+    parser.add_argument('--tolerance', type=float, default=0.02)
+    parser.add_argument('--output', help="Simpan hasil sebagai JSON")
+    args = parser.parse_args(argv)
+
+    positions = sample_positions(args.positions, args.seed, args.include_draws)
+
+    results = {"mate_search": check_mate_search(positions)}
+    for name in args.engines:
+        results[name] = check_engine(name, positions, args)
+        result = results[name]
+        print(f"{name}: accuracy={format_value(result['accuracy'], '.3f')} "
+              f"optimal={format_value(result['optimal_rate'], '.3f')} "
+              f"p50={format_value(result['latency']['p50'], '.4f')}s "
+              f"work/s={format_value(result['work_per_second'], '.0f')}")
+    print(f"mate_search: claims={results['mate_search']['mate_claims']} false={results['mate_search']['false_claims']}")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "git_revision": git_revision(),
+            "settings": vars(args),
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"Hasil disimpan ke {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare_with_baseline(report, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
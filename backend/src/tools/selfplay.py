@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chess
+
+from core.chess_rules import randomize_board
+from core.evaluation import evaluate_board
+from core.kpk_bitbase import DRAW, RESULT_NAMES, get_bitbase, probe, probe_move
+from core.mabp import minimax_alpha_beta_pruning
+from core.iterative_deepening import iterative_deepening_search
+from core.mcts import ROLLOUTS, monte_carlo_tree_search
+
+ENGINES = ["mabp", "iterative_deepening", "mcts"]
+DEFENDERS = ["perfect"] + ENGINES
+
+def engine_move(name, board, settings, seed=None):
+    fen = board.fen()
+    if name == "mabp":
+        result = minimax_alpha_beta_pruning(fen, depth=settings["depth"])
+    elif name == "iterative_deepening":
+        result = iterative_deepening_search(fen, max_depth=settings["depth"], time_limit=settings["time_limit"])
+    else:
+        result = monte_carlo_tree_search(fen, max_iterations=settings["mcts_iterations"], time_limit=settings["time_limit"],
+                                         rollout=settings["mcts_rollout"], seed=seed)
+
+    best_move = result.get("best_move")
+    if best_move:
+        move = chess.Move.from_uci(best_move)
+        if move in board.legal_moves:
+            return move
+    return None
+
+# Defender sempurna: pilih move draw, atau move yang paling lama sampai kalah menurut solver
+def perfect_defender_move(board, rng):
+    best_moves = []
+    best_key = None
+
+    for move in board.legal_moves:
+        outcome = probe_move(board, move)
+        if outcome is None:
+            # Di luar KPK (setelah promosi) pakai evaluasi statis 1 ply
+            board.push(move)
+            key = (0, -evaluate_board(board))
+            board.pop()
+        else:
+            result, plies = outcome
+            key = (2, 0) if result == DRAW else (1, plies)
+
+        if best_key is None or key > best_key:
+            best_key = key
+            best_moves = [move]
+        elif key == best_key:
+            best_moves.append(move)
+
+    return rng.choice(best_moves) if best_moves else None
+
+def game_outcome(board, max_plies):
+    if board.is_checkmate():
+        return "white_win" if board.turn == chess.BLACK else "black_win"
+    if board.is_game_over(claim_draw=True) or len(board.move_stack) >= max_plies:
+        return "draw"
+    return None
+
+def play_game(task):
+    white, defender, fen, settings, seed = task
+    rng = random.Random(seed)
+    board = chess.Board(fen)
+    start_result = probe(board)
+
+    white_times = []
+    black_times = []
+    errors = 0
+
+    while True:
+        outcome = game_outcome(board, settings["max_plies"])
+        if outcome:
+            break
+
+        start = time.perf_counter()
+        if board.turn == chess.WHITE:
+            move = engine_move(white, board, settings, rng.randrange(2 ** 32))
+            white_times.append(time.perf_counter() - start)
+        elif defender == "perfect":
+            move = perfect_defender_move(board, rng)
+            black_times.append(time.perf_counter() - start)
+        else:
+            move = engine_move(defender, board, settings, rng.randrange(2 ** 32))
+            black_times.append(time.perf_counter() - start)
+
+        if move is None:
+            # Engine gagal memberi move, lanjutkan dengan move legal acak
+            errors += 1
+            move = rng.choice(list(board.legal_moves))
+        board.push(move)
+
+    white_moves = len(white_times)
+    return {
+        "w": white,
+        "b": defender,
+        "fen": fen,
+        "exact": RESULT_NAMES[start_result[0]] if start_result else None,
+        "out": outcome,
+        "plies": len(board.move_stack),
+        "mate_in": white_moves if outcome == "white_win" else None,
+        "wt": round(sum(white_times) / white_moves, 5) if white_moves else None,
+        "wt_max": round(max(white_times), 5) if white_times else None,
+        "bt": round(sum(black_times) / len(black_times), 5) if black_times else None,
+        "err": errors,
+    }
+
+def summarize(games):
+    summary = {}
+    for game in games:
+        entry = summary.setdefault(f"{game['w']} vs {game['b']}", {
+            "games": 0, "wins": 0, "draws": 0, "won_positions": 0, "wins_in_won_positions": 0,
+            "mate_moves": [], "time_per_move": [],
+        })
+        entry["games"] += 1
+        entry["wins"] += game["out"] == "white_win"
+        entry["draws"] += game["out"] == "draw"
+        if game["exact"] == "win":
+            entry["won_positions"] += 1
+            entry["wins_in_won_positions"] += game["out"] == "white_win"
+        if game["mate_in"] is not None:
+            entry["mate_moves"].append(game["mate_in"])
+        if game["wt"] is not None:
+            entry["time_per_move"].append(game["wt"])
+
+    for entry in summary.values():
+        mate_moves = entry.pop("mate_moves")
+        times = entry.pop("time_per_move")
+        entry["win_rate"] = entry["wins"] / entry["games"]
+        entry["conversion_rate"] = (
+            entry["wins_in_won_positions"] / entry["won_positions"] if entry["won_positions"] else None
+        )
+        entry["avg_moves_to_mate"] = sum(mate_moves) / len(mate_moves) if mate_moves else None
+        entry["avg_time_per_move"] = sum(times) / len(times) if times else None
+
+    return summary
+
+def warm_worker(needs_bitbase):
+    if needs_bitbase:
+        get_bitbase()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Self-play / turnamen engine KPK memakai semua core")
+    parser.add_argument('--white', nargs='+', choices=ENGINES, default=ENGINES)
+    parser.add_argument('--defenders', nargs='+', choices=DEFENDERS, default=["perfect"])
+    parser.add_argument('--games', type=int, default=20, help="Jumlah posisi awal per pairing")
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--time-limit', type=float, default=2.0)
+    parser.add_argument('--mcts-iterations', type=int, default=300)
+    parser.add_argument('--mcts-rollout', choices=ROLLOUTS, default='random')
+    parser.add_argument('--max-plies', type=int, default=150)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--output', default='selfplay_results.jsonl', help="File hasil (satu baris JSON per game)")
+    args = parser.parse_args(argv)
+
+    settings = {
+        "depth": args.depth,
+        "time_limit": args.time_limit,
+        "mcts_iterations": args.mcts_iterations,
+        "mcts_rollout": args.mcts_rollout,
+        "max_plies": args.max_plies,
+    }
+
+    rng = random.Random(args.seed)
+    start_fens = [randomize_board(rng).fen() for _ in range(args.games)]
+    tasks = [
+        (white, defender, fen, settings, args.seed + index)
+        for white in args.white
+        for defender in args.defenders
+        for index, fen in enumerate(start_fens)
+    ]
+
+    games = []
+    start = time.perf_counter()
+    with Pool(args.workers, initializer=warm_worker, initargs=("perfect" in args.defenders,)) as pool, \
+            open(args.output, 'w') as output:
+        for game in pool.imap_unordered(play_game, tasks):
+            games.append(game)
+            output.write(json.dumps(game, separators=(',', ':')) + "\n")
+
+    print(f"{len(games)} games dalam {time.perf_counter() - start:.1f}s dengan {args.workers} worker")
+    for pairing, entry in summarize(games).items():
+        print(f"{pairing}: {json.dumps(entry)}")
+    print(f"Hasil per game disimpan ke {args.output}")
+
+if __name__ == "__main__":
+    main()
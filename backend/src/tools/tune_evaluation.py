@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from core.evaluation import (
+    DEFAULT_WEIGHTS_PATH, FEATURE_TABLES, TABLE_SIZE, kpk_feature_indices, load_evaluation_table,
+)
+from core.kpk_bitbase import BLACK_KING_SHIFT, DRAW, WHITE_TO_MOVE, WIN, get_bitbase
+
+# Tuning offline evaluation KPK: fit tabel bobot (model linear atas fitur one-hot) terhadap hasil exact
+# solver KPK dengan least squares (conjugate gradient). Target: 0 untuk draw, 1 - 0.5 * plies / max_plies
+# untuk win, sehingga evaluation membedakan menang/draw sekaligus memberi arah progres ke promosi.
+# Butuh NumPy (hanya untuk tool ini, tidak di runtime server).
+
+# Semua posisi valid dari bitbase (orientasi kanonik, pawn di file a-d)
+def bitbase_positions():
+    results, plies = get_bitbase()
+    results = np.frombuffer(results, dtype=np.uint8)
+    plies = np.frombuffer(plies, dtype=np.uint8)
+
+    keys = np.flatnonzero((results == WIN) | (results == DRAW))
+    slot = (keys >> 6) & 31
+    positions = {
+        "wk": keys & 63,
+        "wp": (slot >> 2) * 8 + (slot & 3),
+        "bk": (keys >> BLACK_KING_SHIFT) & 63,
+        "white_to_move": (keys & WHITE_TO_MOVE) != 0,
+    }
+    return positions, results[keys] == WIN, plies[keys].astype(np.float64)
+
+# Versi vectorized dari kpk_feature_indices (core/evaluation.py), satu kolom per tabel fitur
+def feature_matrix(wk, wp, bk, white_to_move):
+    side = white_to_move.astype(np.int64)
+    wk_file, wk_rank = wk & 7, wk >> 3
+    wp_file, wp_rank = wp & 7, wp >> 3
+    bk_file, bk_rank = bk & 7, bk >> 3
+    rook_file = (wp_file == 0).astype(np.int64)
+
+    def relative(file, rank):
+        return (file - wp_file + 7) * 15 + (rank - wp_rank + 7)
+
+    columns = [
+        side * 64 + wp,
+        wp_rank * 225 + relative(wk_file, wk_rank),
+        ((side * 2 + rook_file) * 8 + wp_rank) * 225 + relative(bk_file, bk_rank),
+        side * 225 + (bk_file - wk_file + 7) * 15 + (bk_rank - wk_rank + 7),
+    ]
+
+    offset = 0
+    for column, (_, size) in zip(columns, FEATURE_TABLES):
+        column += offset
+        offset += size
+    return np.stack(columns, axis=1)
+
+# Least squares ter-regularisasi (X^T X + λI) w = X^T y; X one-hot sehingga perkalian cukup lewat indexing
+def fit_least_squares(indices, target, regularization, iterations, tolerance=1e-8):
+    rows = len(target)
+
+    def multiply(weights):
+        return weights[indices].sum(axis=1)
+
+    def multiply_transposed(values):
+        return np.bincount(indices.ravel(), weights=np.repeat(values, indices.shape[1]), minlength=TABLE_SIZE)
+
+    def normal(weights):
+        return multiply_transposed(multiply(weights)) + regularization * rows * weights
+
+    weights = np.zeros(TABLE_SIZE)
+    residual = multiply_transposed(target) - normal(weights)
+    direction = residual.copy()
+    residual_norm = residual @ residual
+
+    for _ in range(iterations):
+        step = normal(direction)
+        alpha = residual_norm / (direction @ step)
+        weights += alpha * direction
+        residual -= alpha * step
+        new_norm = residual @ residual
+        if new_norm < tolerance:
+            break
+        direction = residual + (new_norm / residual_norm) * direction
+        residual_norm = new_norm
+
+    return weights
+
+def classification_accuracy(prediction, wins, threshold):
+    return float(np.mean((prediction >= threshold) == wins))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit tabel evaluation KPK terhadap solver exhaustive")
+    parser.add_argument('--output', default=DEFAULT_WEIGHTS_PATH)
+    parser.add_argument('--regularization', type=float, default=1e-6)
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--holdout', type=float, default=0.1, help="Fraksi posisi untuk validasi")
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--scale', type=int, default=800, help="Skala score (centipawn) untuk prediksi 1.0")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    positions, wins, plies = bitbase_positions()
+    indices = feature_matrix(positions["wk"], positions["wp"], positions["bk"], positions["white_to_move"])
+
+    max_plies = float(plies[wins].max())
+    target = np.where(wins, 1.0 - 0.5 * plies / max_plies, 0.0)
+
+    rng = np.random.default_rng(args.seed)
+    holdout = rng.random(len(target)) < args.holdout
+    weights = fit_least_squares(indices[~holdout], target[~holdout], args.regularization, args.iterations)
+
+    prediction = weights[indices].sum(axis=1)
+    threshold = 0.25
+    report = {
+        "positions": int(len(target)),
+        "train_accuracy": classification_accuracy(prediction[~holdout], wins[~holdout], threshold),
+        "holdout_accuracy": classification_accuracy(prediction[holdout], wins[holdout], threshold),
+        "rmse": float(np.sqrt(np.mean((prediction - target) ** 2))),
+    }
+
+    # Fit ulang dengan semua posisi untuk tabel final
+    weights = fit_least_squares(indices, target, args.regularization, args.iterations)
+    table = {
+        "version": 1,
+        "scale": args.scale,
+        "threshold": threshold,
+        "tables": {},
+        "fit": report,
+    }
+    offset = 0
+    for name, size in FEATURE_TABLES:
+        table["tables"][name] = [round(float(value), 5) for value in weights[offset:offset + size]]
+        offset += size
+
+    with open(args.output, 'w') as file:
+        json.dump(table, file, separators=(",", ":"))
+
+    # Cek implementasi runtime (pure Python) menghasilkan nilai yang sama dengan versi vectorized
+    runtime = load_evaluation_table(args.output)["weights"]
+    sample = rng.choice(len(target), size=min(2000, len(target)), replace=False)
+    mismatches = 0
+    for row in sample:
+        squares = (int(positions["wk"][row]), int(positions["wp"][row]), int(positions["bk"][row]))
+        expected = sum(runtime[index] for index in indices[row])
+        actual = sum(runtime[index] for index in kpk_feature_indices(*squares, bool(positions["white_to_move"][row])))
+        mismatches += expected != actual
+    if mismatches:
+        sys.exit(f"Fitur runtime tidak cocok dengan fitur tuning ({mismatches} posisi)")
+
+    print(f"positions={report['positions']} train_accuracy={report['train_accuracy']:.4f} "
+          f"holdout_accuracy={report['holdout_accuracy']:.4f} rmse={report['rmse']:.4f} "
+          f"time={time.perf_counter() - start:.1f}s")
+    print(f"Tabel disimpan ke {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,46 @@
 import chess
 
+from core.chess_rules import validate_board
+from core.position_index import board_from_squares
+
+# Parse 3 nama square (white king, white pawn, black king) dengan validasi per baris
+def parse_squares(names, first_line=1):
+    positions = []
+    for i, name in enumerate(names):
+        position = name.strip().lower()
+        
+        if len(position) != 2:
+            raise ValueError(f"Baris {i+first_line}: Format posisi tidak valid '{position}', harus 2 karakter (contoh: d4)")
+        
+        file_char = position[0]
+        rank_char = position[1]
+
+        if file_char not in 'abcdefgh':
+            raise ValueError(f"Baris {i+first_line}: File '{file_char}' tidak valid, harus a-h")
+        
+        if rank_char not in '12345678':
+            raise ValueError(f"Baris {i+first_line}: Rank '{rank_char}' tidak valid, harus 1-8")
+
+        positions.append(position)
+    
+    try:
+        wk_square = chess.parse_square(positions[0])
+        wp_square = chess.parse_square(positions[1])
+        bk_square = chess.parse_square(positions[2])
+    except Exception as e:
+        raise ValueError(f"Error parsing squares: {str(e)}")
+    
+    if len(set(positions)) != 3:
+        raise ValueError("Posisi pieces tidak boleh sama")
+
+    pawn_rank = chess.square_rank(wp_square)
+    if pawn_rank == 0:
+        raise ValueError("White pawn tidak boleh di rank 1")
+    if pawn_rank == 7:
+        raise ValueError("White pawn tidak boleh di rank 8")
+
+    return wk_square, wp_square, bk_square
+
 def parse_board(file):
     try:
         content = file.read().decode('utf-8').strip()
@@ -9,100 +50,40 @@ def parse_board(file):
         if len(lines) != 3:
             raise ValueError(f"File harus berisi 3 baris posisi, ditemukan {len(lines)} baris")
         
-        positions = []
-        for i, line in enumerate(lines):
-            position = line.strip().lower()
-            
-            if len(position) != 2:
-                raise ValueError(f"Baris {i+1}: Format posisi tidak valid '{position}', harus 2 karakter (contoh: d4)")
-            
-            file_char = position[0]
-            rank_char = position[1]
-
-            if file_char not in 'abcdefgh':
-                raise ValueError(f"Baris {i+1}: File '{file_char}' tidak valid, harus a-h")
-            
-            if rank_char not in '12345678':
-                raise ValueError(f"Baris {i+1}: Rank '{rank_char}' tidak valid, harus 1-8")
-
-            positions.append(position)
-        
-        try:
-            wk_square = chess.parse_square(positions[0])
-            wp_square = chess.parse_square(positions[1])
-            bk_square = chess.parse_square(positions[2])
-        except Exception as e:
-            raise ValueError(f"Error parsing squares: {str(e)}")
+        wk_square, wp_square, bk_square = parse_squares(lines)
         
-        if len(set(positions)) != 3:
-            raise ValueError("Posisi pieces tidak boleh sama")
-
-        pawn_rank = chess.square_rank(wp_square)
-        if pawn_rank == 0:
-            raise ValueError("White pawn tidak boleh di rank 1")
-        if pawn_rank == 7:
-            raise ValueError("White pawn tidak boleh di rank 8")
-        
-        board = chess.Board()
-        board.clear_board()
-
-        board.set_piece_at(wk_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(wp_square, chess.Piece(chess.PAWN, chess.WHITE))
-        board.set_piece_at(bk_square, chess.Piece(chess.KING, chess.BLACK))
-
-        board.turn = chess.BLACK
-        board.fullmove_number = 1
-        board.halfmove_clock = 0
+        board = board_from_squares(wk_square, wp_square, bk_square)
+        if not validate_board(board):
+            raise ValueError("Invalid board configuration")
 
         return board
 
     except Exception as e:
         raise ValueError(f"Error parsing file: {str(e)}")
 
+# Nama key response per bitboard piece; piece kedua dst. diberi suffix _2, _3, ... (misal setelah promosi)
+POSITION_KEYS = (
+    ("kings", chess.WHITE, "white_king"),
+    ("pawns", chess.WHITE, "white_pawn"),
+    ("queens", chess.WHITE, "white_queen"),
+    ("rooks", chess.WHITE, "white_rook"),
+    ("bishops", chess.WHITE, "white_bishop"),
+    ("knights", chess.WHITE, "white_knight"),
+    ("kings", chess.BLACK, "black_king"),
+)
+
 def board_to_positions(board):
     positions = {}
-    white_pawn_count = 0
-    white_queen_count = 0
-    white_rook_count = 0
-    white_bishop_count = 0
-    white_knight_count = 0
-    
-    for square, piece in board.piece_map().items():
-        square_name = chess.square_name(square)
 
-        if piece.piece_type == chess.KING and piece.color == chess.WHITE:
-            positions["white_king"] = square_name
-        elif piece.piece_type == chess.KING and piece.color == chess.BLACK:
-            positions["black_king"] = square_name
-        elif piece.piece_type == chess.PAWN and piece.color == chess.WHITE:
-            white_pawn_count += 1
-            if white_pawn_count == 1:
-                positions["white_pawn"] = square_name
-            else:
-                positions[f"white_pawn_{white_pawn_count}"] = square_name
-        elif piece.piece_type == chess.QUEEN and piece.color == chess.WHITE:
-            white_queen_count += 1
-            if white_queen_count == 1:
-                positions["white_queen"] = square_name
-            else:
-                positions[f"white_queen_{white_queen_count}"] = square_name
-        elif piece.piece_type == chess.ROOK and piece.color == chess.WHITE:
-            white_rook_count += 1
-            if white_rook_count == 1:
-                positions["white_rook"] = square_name
-            else:
-                positions[f"white_rook_{white_rook_count}"] = square_name
-        elif piece.piece_type == chess.BISHOP and piece.color == chess.WHITE:
-            white_bishop_count += 1
-            if white_bishop_count == 1:
-                positions["white_bishop"] = square_name
-            else:
-                positions[f"white_bishop_{white_bishop_count}"] = square_name
-        elif piece.piece_type == chess.KNIGHT and piece.color == chess.WHITE:
-            white_knight_count += 1
-            if white_knight_count == 1:
-                positions["white_knight"] = square_name
-            else:
-                positions[f"white_knight_{white_knight_count}"] = square_name
+    # Baca langsung dari bitboard, urutan square sama dengan piece_map (h8 ke a1)
+    for attribute, color, name in POSITION_KEYS:
+        mask = getattr(board, attribute) & board.occupied_co[color]
+        if not mask:
+            continue
+        if not mask & (mask - 1):
+            positions[name] = chess.SQUARE_NAMES[mask.bit_length() - 1]
+            continue
+        for index, square in enumerate(chess.scan_reversed(mask), 1):
+            positions[name if index == 1 else f"{name}_{index}"] = chess.SQUARE_NAMES[square]
 
-    return positions
\ No newline at end of file
+    return positions
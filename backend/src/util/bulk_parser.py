@@ -0,0 +1,95 @@
+import io
+import os
+
+import chess
+
+from core.chess_rules import validate_board
+from core.position_index import board_from_squares
+from util.board_parser import parse_squares
+
+# Parser streaming untuk file berisi banyak posisi. Format yang diterima (boleh dicampur):
+# - blok 3 baris square (white king, white pawn, black king), seperti file upload biasa
+# - satu posisi per baris: "e1 e2 e8" atau "e1,e2,e8"
+# - FEN atau EPD per baris
+# Baris kosong memisahkan blok, teks setelah '#' diabaikan. File dibaca per baris, tidak dimuat seluruhnya.
+
+# Handle baru ke file upload (FileStorage) yang tetap terbuka setelah Flask menutup request.files, untuk
+# response yang di-stream setelah view selesai. Upload kecil yang masih di memori dipindah ke disk dulu.
+def open_upload(storage):
+    stream = storage.stream
+    try:
+        handle = open(os.dup(stream.fileno()), 'rb')
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return io.BytesIO(stream.read())
+    handle.seek(stream.tell())
+    return handle
+
+def iter_lines(file):
+    stream = getattr(file, 'stream', file)
+    if isinstance(stream.read(0), bytes):
+        stream = io.TextIOWrapper(stream, encoding='utf-8', errors='replace')
+    return stream
+
+def _record(line, board):
+    if not validate_board(board):
+        return {"line": line, "error": f"Baris {line}: Invalid board configuration"}
+    return {"line": line, "board": board}
+
+def _from_squares(line, names):
+    try:
+        wk, wp, bk = parse_squares(names, first_line=line)
+    except ValueError as e:
+        message = str(e)
+        return {"line": line, "error": message if message.startswith("Baris") else f"Baris {line}: {message}"}
+    return _record(line, board_from_squares(wk, wp, bk))
+
+def _from_fen(line, text):
+    try:
+        # FEN lengkap punya 6 field, selain itu diperlakukan sebagai EPD (boleh ada operasi setelah ';')
+        if len(text.split()) == 6 and ';' not in text:
+            board = chess.Board(text)
+        else:
+            board, _ = chess.Board.from_epd(text)
+    except ValueError as e:
+        return {"line": line, "error": f"Baris {line}: FEN/EPD tidak valid: {str(e)}"}
+    return _record(line, board)
+
+def parse_positions(file):
+    block = []
+
+    def incomplete_block():
+        line = block[0][0]
+        block.clear()
+        return {"line": line, "error": f"Baris {line}: blok posisi harus berisi 3 baris square"}
+
+    for line_number, raw in enumerate(iter_lines(file), 1):
+        text = raw.split('#', 1)[0].strip()
+
+        if not text:
+            if block:
+                yield incomplete_block()
+            continue
+
+        if '/' in text:
+            if block:
+                yield incomplete_block()
+            yield _from_fen(line_number, text)
+            continue
+
+        tokens = text.replace(',', ' ').split()
+        if len(tokens) == 3:
+            if block:
+                yield incomplete_block()
+            yield _from_squares(line_number, tokens)
+        elif len(tokens) == 1:
+            block.append((line_number, tokens[0]))
+            if len(block) == 3:
+                yield _from_squares(block[0][0], [name for _, name in block])
+                block.clear()
+        else:
+            if block:
+                yield incomplete_block()
+            yield {"line": line_number, "error": f"Baris {line_number}: format posisi tidak dikenali"}
+
+    if block:
+        yield incomplete_block()
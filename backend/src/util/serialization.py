@@ -0,0 +1,66 @@
+import json
+
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+# orjson opsional: jika terpasang dipakai untuk semua response JSON, jika tidak fallback ke json bawaan
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+COMPACT_MIMETYPE = "application/vnd.kpk.compact+json"
+
+# Field yang bisa diturunkan client dari FEN, tidak dikirim di format compact
+COMPACT_DROPPED_FIELDS = ("positions",)
+
+# Tipe di luar JSON (date, Decimal, UUID, dataclass, __html__) diserialisasi seperti provider default Flask;
+# datetime juga lewat default supaya formatnya (HTTP date) sama dengan/tanpa orjson
+def dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, default=DefaultJSONProvider.default,
+                           option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(obj, default=DefaultJSONProvider.default, separators=(",", ":")).encode()
+
+# Schema minimal: tanpa field turunan, tanpa nilai kosong, float dibulatkan
+def compact_payload(obj):
+    if isinstance(obj, dict):
+        return {
+            key: compact_payload(value)
+            for key, value in obj.items()
+            if value is not None and value != {} and key not in COMPACT_DROPPED_FIELDS
+        }
+    if isinstance(obj, list):
+        # Daftar string (square, move UCI) tidak perlu ditelusuri
+        if not obj or isinstance(obj[0], str):
+            return obj
+        return [compact_payload(value) for value in obj]
+    if isinstance(obj, float):
+        return round(obj, 4)
+    return obj
+
+# Client meminta format compact lewat query ?format=compact atau header Accept
+def wants_compact():
+    if not has_request_context():
+        return False
+    return request.args.get("format") == "compact" or COMPACT_MIMETYPE in request.headers.get("Accept", "")
+
+# Argumen jsonify(): satu nilai, beberapa nilai (list), atau keyword (dict)
+def response_payload(args, kwargs):
+    if args and kwargs:
+        raise TypeError("app.json.response() takes either args or kwargs, not both")
+    if len(args) == 1:
+        return args[0]
+    return args or kwargs or None
+
+class FastJSONProvider(DefaultJSONProvider):
+    sort_keys = False
+
+    def response(self, *args, **kwargs):
+        obj = response_payload(args, kwargs)
+        mimetype = self.mimetype
+        if wants_compact():
+            obj = compact_payload(obj)
+            mimetype = COMPACT_MIMETYPE
+
+        return self._app.response_class(dumps(obj), mimetype=mimetype)
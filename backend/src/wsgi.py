@@ -0,0 +1,11 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api.endpoints import app
+from api.warmup import warm_tables
+
+# Tabel di-load sekali di master sebelum fork, worker berbagi memori copy-on-write.
+# Warmup search per worker dijalankan setelah fork (post_worker_init di gunicorn.conf.py).
+warm_tables()
@@ -0,0 +1,24 @@
+from core.mcts import monte_carlo_tree_search
+from core.search_state import SearchState
+
+# Promosi g7 dengan mate terpaksa: root terbukti dalam beberapa iterasi
+MATE_FEN = "7k/5K2/6P1/8/8/8/8/8 w - - 0 1"
+
+def search(state):
+    return monte_carlo_tree_search(MATE_FEN, time_limit=5.0, state=state, rollout='static', seed=0)
+
+def test_proven_root_reports_mate_in_plies():
+    result = search(None)
+    assert result['proven'] == 'win'
+    assert result['mate_in'] == result['mate_distance']
+
+# Search kedua di sesi yang sama memakai ulang root yang sudah terbukti dan fully expanded
+def test_reused_proven_root_returns_without_iterating():
+    state = SearchState(tt_entries=1000)
+    first = search(state)
+    second = search(state)
+
+    assert 'error' not in second
+    assert second['iterations'] == 0
+    assert second['best_move'] == first['best_move']
+    assert second['proven'] == 'win'
@@ -0,0 +1,44 @@
+import random
+
+import chess
+import pytest
+
+from core.chess_rules import validate_board
+from core.position_index import board_from_squares
+from core.symmetry import canonical_key
+
+def random_kpk_boards(count, seed=2024):
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        wk, wp, bk = rng.randrange(64), rng.randrange(8, 56), rng.randrange(64)
+        if len({wk, wp, bk}) == 3:
+            boards.append(board_from_squares(wk, wp, bk, rng.choice((chess.WHITE, chess.BLACK))))
+    return boards
+
+# Tabel legalitas harus sama persis dengan validasi python-chess
+def test_validate_board_matches_is_valid():
+    mismatches = [board.fen() for board in random_kpk_boards(20000) if validate_board(board) != board.is_valid()]
+    assert mismatches == []
+
+@pytest.mark.parametrize("fen", [
+    "8/8/8/4k3/8/8/1P6/1K6 w - - 0 1",
+    "8/8/8/4k3/8/8/1PP5/1K6 w - - 0 1",
+    "8/8/8/4k3/8/8/1N6/1K6 w - - 0 1",
+    "8/8/8/4k3/8/8/1p6/1K6 w - - 0 1",
+    "8/8/8/4k3/8/8/8/1K6 w - - 0 1",
+])
+def test_validate_board_rejects_non_kpk(fen):
+    board = chess.Board(fen)
+    assert validate_board(board) == (fen == "8/8/8/4k3/8/8/1P6/1K6 w - - 0 1")
+
+def test_canonical_key_is_mirror_invariant():
+    for board in random_kpk_boards(2000, seed=7):
+        mirrored = board.transform(chess.flip_horizontal)
+        key, was_mirrored = canonical_key(board)
+        mirror_key, mirror_was_mirrored = canonical_key(mirrored)
+
+        assert key == mirror_key, board.fen()
+        # Tepat satu orientasi di-mirror, kecuali posisi simetris
+        if board.board_fen() != mirrored.board_fen():
+            assert was_mirrored != mirror_was_mirrored, board.fen()
@@ -0,0 +1,117 @@
+import time
+
+import chess
+import pytest
+
+from api.search_service import SearchBusy, SearchCancelled, SearchPool, SearchTimeout
+
+FEN = "8/8/8/4k3/8/8/1P6/1K6 w - - 0 1"
+
+# Satu proses engine dan antrian satu slot supaya kondisi penuh/antri mudah dibuat
+@pytest.fixture(scope="module")
+def pool():
+    pool = SearchPool(workers=1, max_pending=1)
+    assert pool.wait_ready(60)
+    yield pool
+    pool.close()
+
+def submit(pool, algorithm='mcts', deadline=10.0, time_limit=5.0):
+    return pool.submit(algorithm, FEN, {'time_limit': time_limit}, time.monotonic() + deadline)
+
+def wait_until(predicate, timeout=5.0):
+    expires = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < expires, "timeout"
+        time.sleep(0.01)
+
+def wait_running(pool, task):
+    wait_until(lambda: pool.stats()["running"] == 1 and task.future.running())
+
+def engine_pid(pool):
+    return pool._engines[0].process.pid
+
+def finish(pool, task):
+    pool.stop(task)
+    try:
+        return pool.wait(task)
+    except SearchCancelled:
+        return None
+
+def test_search_returns_legal_move(pool):
+    result = pool.wait(submit(pool, algorithm='mabp'))
+    assert chess.Move.from_uci(result['best_move']) in chess.Board(FEN).legal_moves
+
+def test_full_queue_rejects_submit(pool):
+    running = submit(pool)
+    wait_running(pool, running)
+    queued = submit(pool)
+    try:
+        with pytest.raises(SearchBusy):
+            submit(pool)
+    finally:
+        finish(pool, queued)
+        finish(pool, running)
+
+# Stop kooperatif: hasil terbaik sejauh ini dikembalikan tanpa mematikan proses engine
+def test_stop_running_task_returns_best_move(pool):
+    pid = engine_pid(pool)
+    task = submit(pool)
+    wait_running(pool, task)
+    time.sleep(0.3)
+
+    start = time.monotonic()
+    assert pool.stop(task)
+    result = pool.wait(task)
+
+    assert time.monotonic() - start < 1.0
+    assert result['stopped'] == 'cancelled'
+    assert result['best_move']
+    assert engine_pid(pool) == pid
+
+def test_deadline_on_running_task_returns_partial_result(pool):
+    pid = engine_pid(pool)
+    start = time.monotonic()
+    result = pool.wait(submit(pool, deadline=0.8))
+
+    assert time.monotonic() - start < 2.0
+    assert result['stopped'] == 'cancelled'
+    assert result['best_move']
+    assert engine_pid(pool) == pid
+
+def test_stop_queued_task_raises_cancelled(pool):
+    running = submit(pool)
+    wait_running(pool, running)
+    queued = submit(pool)
+    try:
+        assert not pool.stop(queued)
+        with pytest.raises(SearchCancelled):
+            pool.wait(queued)
+    finally:
+        finish(pool, running)
+
+    assert pool.stats()["pending"] == 0
+
+def test_cancel_replaces_engine_process(pool):
+    pid = engine_pid(pool)
+    task = submit(pool)
+    wait_running(pool, task)
+
+    pool.cancel(task)
+    with pytest.raises(SearchCancelled):
+        pool.wait(task)
+
+    assert pool.wait_ready(60)
+    assert engine_pid(pool) != pid
+    assert pool.wait(submit(pool, algorithm='mabp'))['best_move']
+
+# Deadline task di antrian: stop membatalkannya, cancel setelahnya tidak boleh menghapus dari antrian lagi
+def test_deadline_on_queued_task_raises_timeout(pool):
+    running = submit(pool)
+    wait_running(pool, running)
+    queued = submit(pool, deadline=0.3)
+    try:
+        with pytest.raises(SearchTimeout):
+            pool.wait(queued)
+        assert pool.stats()["pending"] == 0
+    finally:
+        finish(pool, running)
@@ -15,24 +15,31 @@ export default function ChessBoard() {
     const files = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h'];
 
     useEffect(() => {
-        // Load legal moves dari square yang dipilih
-        const loadLegalMoves = async () => {
-            if (state.selectedSquare && state.board) {
+        // Load peta legal moves seluruh board sekali per giliran
+        const loadLegalMoveMap = async () => {
+            if (state.board && state.currentTurn === 'black') {
                 try {
-                    const result = await ChessAPI.getLegalMoves(state.board, state.selectedSquare);
+                    const result = await ChessAPI.getLegalMoveMap(state.board);
                     if (result.success) {
-                        dispatch({ type: 'SET_LEGAL_MOVES', payload: result.legal_moves });
+                        dispatch({ type: 'SET_LEGAL_MOVE_MAP', payload: { board: state.board, moves: result.moves } });
                     }
                 } catch (error) {
                     console.error('Error loading legal moves:', error);
                 }
-            } else {
-                dispatch({ type: 'SET_LEGAL_MOVES', payload: [] });
             }
         };
 
-        loadLegalMoves();
-    }, [state.selectedSquare, state.board, dispatch]);
+        loadLegalMoveMap();
+    }, [state.board, state.currentTurn, dispatch]);
+
+    useEffect(() => {
+        // Legal moves dari square yang dipilih diambil dari peta, tanpa request per klik
+        if (state.selectedSquare && state.legalMoveMap) {
+            dispatch({ type: 'SET_LEGAL_MOVES', payload: state.legalMoveMap[state.selectedSquare] || [] });
+        } else {
+            dispatch({ type: 'SET_LEGAL_MOVES', payload: [] });
+        }
+    }, [state.selectedSquare, state.legalMoveMap, dispatch]);
 
     const checkAndMakeMove = async (move: string, toSquare: string) => {
         const fromSquare = state.selectedSquare;
@@ -21,7 +21,10 @@ export default function GameControl() {
         
         dispatch({ type: "SET_LOADING", payload: true });
         try {
-            const result = await ChessAPI.solvePosition(state.board, state.selectedAlgorithm);
+            // Info search sementara (per depth / berkala) ditampilkan selama AI berpikir
+            const result = await ChessAPI.solvePosition(state.board, state.selectedAlgorithm, undefined, (info) => {
+                dispatch({ type: 'SET_ANALYSIS', payload: info });
+            });
             
             if (result.success) {
                 if (result.promotion_required) {
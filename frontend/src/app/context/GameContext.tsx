@@ -7,6 +7,7 @@ interface GameState {
     positions: any;
     selectedSquare: string | null;
     legalMoves: string[];
+    legalMoveMap: Record<string, string[]> | null;
     currentTurn: 'white' | 'black';
     selectedAlgorithm: string;
     mateInfo: any;
@@ -25,6 +26,7 @@ type GameAction =
     | { type: 'SET_BOARD'; payload: { board: string; positions: any; mateInfo?: any } }
     | { type: 'SET_SELECTED_SQUARE'; payload: string | null }
     | { type: 'SET_LEGAL_MOVES'; payload: string[] }
+    | { type: 'SET_LEGAL_MOVE_MAP'; payload: { board: string; moves: Record<string, string[]> } }
     | { type: 'SET_ALGORITHM'; payload: string }
     | { type: 'SET_ANALYSIS'; payload: any }
     | { type: 'SET_MATE_INFO'; payload: any }
@@ -43,6 +45,7 @@ const initialState: GameState = {
     positions: {},
     selectedSquare: null,
     legalMoves: [],
+    legalMoveMap: null,
     currentTurn: 'black',
     selectedAlgorithm: '',
     mateInfo: null,
@@ -81,6 +84,7 @@ function gameReducer(state: GameState, action: GameAction): GameState {
                     currentTurn: newCurrentTurn,
                     selectedSquare: null,
                     legalMoves: [],
+                    legalMoveMap: null,
                     historyIndex: null
                 };
             } catch (error) {
@@ -91,6 +95,10 @@ function gameReducer(state: GameState, action: GameAction): GameState {
             return { ...state, selectedSquare: action.payload };
         case 'SET_LEGAL_MOVES':
             return { ...state, legalMoves: action.payload };
+        case 'SET_LEGAL_MOVE_MAP':
+            // Abaikan respons untuk board yang sudah berganti
+            if (action.payload.board !== state.board) return state;
+            return { ...state, legalMoveMap: action.payload.moves };
         case 'SET_ALGORITHM':
             return { ...state, selectedAlgorithm: action.payload };
         case 'SET_ANALYSIS':
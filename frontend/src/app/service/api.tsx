@@ -1,4 +1,125 @@
 const API_BASE = 'http://localhost:5000/api';
+const WS_URL = API_BASE.replace(/^http/, 'ws') + '/ws';
+
+type PendingRequest = {
+    resolve: (result: any) => void;
+    reject: (error: Error) => void;
+    final: string[];
+    onInfo?: (info: any) => void;
+};
+
+// Satu koneksi WebSocket per game: move, balasan AI, dan info search tanpa HTTP request per giliran
+class GameSocket {
+    private socket: WebSocket | null = null;
+    private opening: Promise<WebSocket> | null = null;
+    private pending = new Map<number, PendingRequest>();
+    private nextId = 1;
+    private sessionId: string | null = null;
+    private board: string | null = null;
+    private unavailable = false;
+
+    get available() {
+        return typeof WebSocket !== 'undefined' && !this.unavailable;
+    }
+
+    private connect(): Promise<WebSocket> {
+        if (this.socket && this.socket.readyState === WebSocket.OPEN) {
+            return Promise.resolve(this.socket);
+        }
+        if (this.opening) {
+            return this.opening;
+        }
+
+        this.opening = new Promise((resolve, reject) => {
+            const socket = new WebSocket(WS_URL);
+
+            socket.onopen = () => {
+                this.socket = socket;
+                this.opening = null;
+                // Koneksi baru: board harus disinkronkan ulang dengan server
+                this.board = null;
+                resolve(socket);
+            };
+            socket.onerror = () => {
+                if (this.opening) {
+                    this.opening = null;
+                    this.unavailable = true;
+                    reject(new Error('WebSocket unavailable'));
+                }
+            };
+            socket.onclose = () => {
+                this.socket = null;
+                this.pending.forEach((request) => request.reject(new Error('Connection closed')));
+                this.pending.clear();
+            };
+            socket.onmessage = (event) => this.handleMessage(JSON.parse(event.data));
+        });
+
+        return this.opening;
+    }
+
+    private handleMessage(message: any) {
+        const request = this.pending.get(message.id);
+        if (!request) return;
+
+        if (message.type === 'info') {
+            request.onInfo?.(message);
+            return;
+        }
+
+        if (message.board) {
+            this.board = message.board;
+        }
+        if (message.session_id) {
+            this.sessionId = message.session_id;
+        }
+
+        if (message.type === 'error') {
+            this.pending.delete(message.id);
+            request.reject(new Error(message.error || 'Request failed'));
+        } else if (request.final.includes(message.type)) {
+            this.pending.delete(message.id);
+            request.resolve(message);
+        }
+    }
+
+    private async request(message: any, final: string[], onInfo?: (info: any) => void) {
+        const socket = await this.connect();
+        const id = this.nextId++;
+
+        return new Promise<any>((resolve, reject) => {
+            this.pending.set(id, { resolve, reject, final, onInfo });
+            socket.send(JSON.stringify({ ...message, id }));
+        });
+    }
+
+    // Mulai (atau sinkronkan ulang) sesi jika board di client berbeda dengan board terakhir di server
+    private async sync(fen: string) {
+        if (this.board !== fen) {
+            await this.request({ type: 'start', fen, session_id: this.sessionId }, ['position']);
+        }
+    }
+
+    async makeMove(fen: string, move: string) {
+        await this.sync(fen);
+        return this.request({ type: 'move', move }, ['position']);
+    }
+
+    async solve(fen: string, algorithm: string, promotionMove?: string, onInfo?: (info: any) => void) {
+        await this.sync(fen);
+        return this.request({ type: 'solve', algorithm, promotion_move: promotionMove }, ['ai_move'], onInfo);
+    }
+
+    // Hentikan search yang sedang berjalan; solve() tetap selesai dengan move terbaik sejauh ini
+    async stop() {
+        if (!this.socket || this.socket.readyState !== WebSocket.OPEN) {
+            return { stopped: false };
+        }
+        return this.request({ type: 'stop' }, ['stopped']);
+    }
+}
+
+const gameSocket = new GameSocket();
 
 export class ChessAPI {
     static async uploadBoard(file: File) {
@@ -34,7 +155,15 @@ export class ChessAPI {
         return response.json();
     }
 
-    static async solvePosition(fen: string, algorithm: string, promotionMove?: string) {
+    static async solvePosition(fen: string, algorithm: string, promotionMove?: string, onInfo?: (info: any) => void) {
+        if (gameSocket.available) {
+            try {
+                return await gameSocket.solve(fen, algorithm, promotionMove, onInfo);
+            } catch (error) {
+                if (gameSocket.available) throw error;
+            }
+        }
+
         const body: any = { fen, algorithm };
         if (promotionMove) {
             body.promotion_move = promotionMove;
@@ -56,7 +185,19 @@ export class ChessAPI {
         return response.json();
     }
 
+    static async stopSearch() {
+        return gameSocket.stop();
+    }
+
     static async makeMove(fen: string, move: string) {
+        if (gameSocket.available) {
+            try {
+                return await gameSocket.makeMove(fen, move);
+            } catch (error) {
+                if (gameSocket.available) throw error;
+            }
+        }
+
         const response = await fetch(`${API_BASE}/gukesh-move`, {
             method: 'POST',
             headers: {
@@ -94,6 +235,27 @@ export class ChessAPI {
         return response.json();
     }
 
+    static async getLegalMoveMap(fen: string, withMateInfo = false) {
+        if (!fen || fen.trim() === '') {
+            throw new Error('Board position (FEN) is required');
+        }
+
+        const response = await fetch(`${API_BASE}/legal-moves`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ fen, with_mate_info: withMateInfo })
+        });
+
+        if (!response.ok) {
+            const errorData = await response.json().catch(() => ({ error: 'Failed to get legal moves' }));
+            throw new Error(errorData.error || 'Failed to get legal moves');
+        }
+
+        return response.json();
+    }
+
     static async parseFen(fen: string) {
         const response = await fetch(`${API_BASE}/parse-fen`, {
             method: 'POST',